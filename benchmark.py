@@ -0,0 +1,228 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import contextlib
+from typing import Dict, List, Optional
+
+from mock_jira import MockJira, ISSUE_TYPES, EXPIRE_TRANSITION, serve
+
+# END-TO-END BENCHMARKS AGAINST mock_jira.py - NOTHING HERE TOUCHES A REAL JIRA #
+# Run with: python benchmark.py [--scenarios extract transitions] [--sizes 1000 5000] [--latency 0.02] #
+
+# SIZE = ISSUES FOR extract/transitions, PROJECTS FOR clean_project/close_projects #
+SCENARIOS = {
+    "extract": (1000, 5000, 20000),
+    "transitions": (500, 2000, 5000),
+    "clean_project": (5, 20, 50),
+    "close_projects": (5, 20, 50),
+}
+ISSUE_PROJECTS = 10
+# CLIENT LIMITER START RATE - None KEEPS THE jira_auth DEFAULT (UNCAPPED UNTIL X-RateLimit-* HEADERS) #
+CLIENT_RATE = None
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+# ------------------------------------------------------------------
+# CHILD PROCESS - ONE SCENARIO PER PROCESS SO PEAK RSS IS ITS OWN
+# ------------------------------------------------------------------
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KILOBYTES ON LINUX, BYTES ON MACOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def run_extract(size: int, projects: List[str], workdir: str):
+    import issue_extraction
+    jql = issue_extraction.build_jql(projects, ISSUE_TYPES)
+    pages = issue_extraction.fetch_issues(
+        jql,
+        0,
+        issue_extraction.max_results_per_query,
+        fields=issue_extraction.report_fields
+    )
+    return issue_extraction.save_report(
+        issue_extraction.process_pages(pages),
+        'xlsx',
+        os.path.join(workdir, 'Issue_Extraction.xlsx')
+    )
+
+
+def run_transitions(size: int, projects: List[str], workdir: str):
+    import jira_issuemanager
+    jql = f'project in ({", ".join(projects)}) ORDER BY key ASC'
+    issues = jira_issuemanager.search_issues(jql, jira_issuemanager.issue_fields)
+    ledger = jira_issuemanager.bulk_transition(
+        jira_issuemanager.jira_api,
+        issues,
+        int(EXPIRE_TRANSITION),
+        fields=jira_issuemanager.transition_fields
+    )
+    return len(ledger)
+
+
+def run_clean_project(size: int, projects: List[str], workdir: str):
+    from jira_auth import session, BASE_URL
+    from jira_cache import TTLCache
+    from jira_roles import JiraRoles, KEEP_GROUPS
+    roles = JiraRoles(session, BASE_URL, cache=TTLCache())
+    for project in projects:
+        roles.clean_project(project, KEEP_GROUPS)
+    return len(projects)
+
+
+def run_close_projects(size: int, projects: List[str], workdir: str):
+    from jira_projectcloser import ProjectCloser, KEEP_GROUPS, FIELDS
+    results, failed = ProjectCloser().close_projects(projects, KEEP_GROUPS, FIELDS)
+    return len(results) - len(failed)
+
+
+RUNNERS = {
+    "extract": run_extract,
+    "transitions": run_transitions,
+    "clean_project": run_clean_project,
+    "close_projects": run_close_projects,
+}
+
+
+def child(scenario: str, size: int, projects: List[str], client_rate: Optional[float]):
+    import logging
+    import jira_auth
+    if client_rate:
+        jira_auth.rate_limiter.rate = client_rate
+        jira_auth.rate_limiter.capacity = client_rate
+        jira_auth.rate_limiter.tokens = client_rate
+
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        logging.disable(logging.INFO)
+        started = time.perf_counter()
+        items = RUNNERS[scenario](size, projects, workdir)
+        wall = time.perf_counter() - started
+    print(RESULT_PREFIX + json.dumps({"wall": wall, "items": items, "peak_rss_mb": peak_rss_mb()}))
+
+
+# ------------------------------------------------------------------
+# PARENT PROCESS - MOCK SERVER, ONE CHILD PER (SCENARIO, SIZE), REPORT
+# ------------------------------------------------------------------
+
+def run_scenario(scenario: str, size: int, args) -> Dict:
+    role_scenario = scenario in ("clean_project", "close_projects")
+    jira = MockJira(
+        issues=1 if role_scenario else size,
+        projects=size if role_scenario else ISSUE_PROJECTS,
+        actors_per_role=args.actors_per_role,
+        page_size=args.page_size,
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        burst_every=args.burst_every,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    server = serve(jira)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    # THE CHILD RUNS IN A TEMP DIR - HTTP CACHE, SNAPSHOT, JOURNALS AND REPORTS NEVER LAND IN THE REPO
+    workdir = tempfile.mkdtemp(prefix="jira_bench_")
+    env = dict(
+        os.environ,
+        JIRA_URL=url,
+        JIRA_TOKEN="benchmark",
+        JIRA_HTTP_CACHE_DIR=os.path.join(workdir, ".jira_http_cache"),
+        PYTHONUNBUFFERED="1"
+    )
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        "--child", scenario,
+        "--child-size", str(size),
+        *(["--client-rate", str(args.client_rate)] if args.client_rate else []),
+        "--projects", *jira.project_keys(),
+    ]
+    try:
+        completed = subprocess.run(command, env=env, capture_output=True, text=True, cwd=workdir)
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"Scenario {scenario} ({size}) failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    stats = jira.stats
+    result.update({
+        "scenario": scenario,
+        "size": size,
+        "requests": stats["requests"],
+        "requests_per_second": stats["requests"] / result["wall"] if result["wall"] else 0.0,
+        "rate_limited": stats["rate_limited"],
+        "errors": stats["errors"],
+        "mb_sent": stats["bytes_sent"] / (1024 * 1024),
+        "endpoints": stats["endpoints"],
+    })
+    return result
+
+
+def print_report(results: List[Dict]):
+    header = f"{'scenario':<15}{'size':>8}{'wall (s)':>11}{'requests':>10}{'req/s':>10}{'429':>6}{'5xx':>6}" \
+             f"{'MB recv':>9}{'peak RSS MB':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "n/a"
+        print(
+            f"{r['scenario']:<15}{r['size']:>8}{r['wall']:>11.2f}{r['requests']:>10}{r['requests_per_second']:>10.1f}"
+            f"{r['rate_limited']:>6}{r['errors']:>6}{r['mb_sent']:>9.1f}{rss:>13}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks against the local mock Jira")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=None, help="overrides the sizes of every scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added by the mock to every request")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--actors-per-role", type=int, default=20)
+    parser.add_argument("--rate-limit", type=float, default=None, help="mock server limit in requests per second")
+    parser.add_argument("--burst-every", type=int, default=0, help="mock 429 burst every N requests")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock answers that are 5xx")
+    parser.add_argument("--client-rate", type=float, default=CLIENT_RATE, help="client limiter start rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="also save the results (with per-endpoint counts) here")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-size", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--projects", nargs="*", default=[], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.child_size, args.projects, args.client_rate)
+
+    results = []
+    for scenario in args.scenarios:
+        for size in args.sizes or SCENARIOS[scenario]:
+            print(f"Running {scenario} ({size})...", flush=True)
+            results.append(run_scenario(scenario, size, args))
+    print()
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
-import os
 import json
 import logging
-from atlassian import Jira
+from jira_auth import get_jira
 from dotenv import load_dotenv
 
 # LOAD ENV
@@ -10,16 +9,8 @@ load_dotenv()
 # LOGGING
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# JIRA API
-JIRA_URL = os.getenv('JIRA_URL')
-JIRA_USERNAME = os.getenv('JIRA_USERNAME')
-JIRA_TOKEN = os.getenv('JIRA_TOKEN')
-
-jira_api = Jira(
-    url=JIRA_URL,
-    username=JIRA_USERNAME,
-    token=JIRA_TOKEN
-)
+# JIRA API - SHARED POOLED TRANSPORT FROM jira_auth.py
+jira_api = get_jira()
 
 # REPLACE WITH YOUR ISSUE KEY
 issue_key = "JIRAISSUE-315"
@@ -2,466 +2,421 @@ import os
 import re
 import json
 import logging
-import openpyxl
-from atlassian import Jira
+from time import sleep
+from datetime import datetime, timedelta
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from jira_auth import get_jira
+from jira_catalog import get_catalog
 from requests.exceptions import HTTPError
-from datetime import datetime, time
-from openpyxl.styles import NamedStyle
 from dotenv import load_dotenv
+from jira_fieldmap import FieldSpec, compile_field_map, required_fields, normalize_parallel
+from jira_store import IssueStore
+from jira_writers import WRITERS, write_report
 
 # LOAD ENV #
 load_dotenv()
 
 # VARIABLES AND GLOBAL CONFIG #
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-date_style = NamedStyle(name='date_style', number_format='DD/MM/YYYY')
 
-# JIRA API CONFIG #
-JIRA_URL = os.getenv('JIRA_URL')
-JIRA_USERNAME = os.getenv('JIRA_USERNAME')
-JIRA_TOKEN = os.getenv('JIRA_TOKEN')
-
-jira_api = Jira(
-    url=JIRA_URL, username=JIRA_USERNAME,
-    token=JIRA_TOKEN
-)
+# JIRA API CONFIG - SHARED POOLED TRANSPORT FROM jira_auth.py #
+jira_api = get_jira()
 logging.info("JIRA API Configurada e Autenticada.")
 
 # SEARCHING PROJECTS #
 search_terms = ["ProjectName1", "ProjectName2"]
-all_projects = jira_api.projects()
 
-matching_projects = [
-    p["key"]
-    for p in all_projects
-    if any(term.lower() in p["name"].lower() for term in search_terms)
-]
 
-if not matching_projects:
-    logging.warning(f"Zero projects found using {search_terms}.")
-else:
-    logging.info(f"{len(matching_projects)} projects found.")
+def find_projects(terms):
+    # INDEXED, CASE-INSENSITIVE NAME MATCH - SEE jira_catalog.py
+    matching_projects = get_catalog().search(terms)
+    if not matching_projects:
+        logging.warning(f"Zero projects found using {terms}.")
+    else:
+        logging.info(f"{len(matching_projects)} projects found.")
+    return matching_projects
+
 
 # CONSTRUINDO JQL #
 type_keys = ['TypeKey1', 'TypeKey2', 'TypeKey3']
-quoted_types = [f'"{type_key}"' for type_key in type_keys]
-type_keys_str = ', '.join(quoted_types)
-jql_query = f'Project IN ({", ".join(matching_projects)}) AND Type IN ({type_keys_str})'
 
-logging.info(f"Running Query: {jql_query}")
+
+def build_jql(projects, types, updated_since=None):
+    quoted_types = [f'"{type_key}"' for type_key in types]
+    type_keys_str = ', '.join(quoted_types)
+    jql = f'Project IN ({", ".join(projects)}) AND Type IN ({type_keys_str})'
+    if updated_since is not None:
+        jql += f' AND updated >= "{updated_since.strftime("%Y/%m/%d %H:%M")}"'
+    return jql + ' ORDER BY key ASC'
+
 
 start_at_index = 0
 max_results_per_query = 150
-all_jira_issues = []
+max_fetch_workers = 8
+max_page_attempts = 3
+
+
+class PageFetchError(Exception):
+    pass
+
+# INCREMENTAL MODE (OPT-IN) - ONLY ISSUES UPDATED SINCE THE LAST SUCCESSFUL RUN ARE FETCHED #
+incremental_extraction = False
+snapshot_file = 'Issue_Snapshot.db'
+incremental_overlap_minutes = 5
+# AFTER AN INCREMENTAL RUN, A KEYS-ONLY QUERY DROPS ISSUES DELETED OR MOVED OUT OF THE JQL #
+reconcile_deleted = True
+
+# OFFLINE MODE - REBUILDS THE EXCEL FROM THE LOCAL SNAPSHOT WITHOUT ANY JIRA CALL #
+offline_report = False
 
 
 # EXTRACT JIRA ISSUES #
-def fetch_issues(jql, start_at, max_results):
-    while True:
+def fetch_page(jql, start_at, max_results, fields=None):
+    for attempt in range(1, max_page_attempts + 1):
         try:
-            issues = jira_api.jql(jql, start=start_at, limit=max_results)
-            if not issues['issues']:
-                break
-            all_jira_issues.extend(issues['issues'])
-            start_at += len(issues['issues'])
-            logging.info(f"Issue(s) found: {len(issues['issues'])}.")
+            return jira_api.jql(jql, fields=fields or '*all', start=start_at, limit=max_results)
         except HTTPError as err:
-            logging.error(f"Error HTTP: {err.response.status_code} - {err.response.text}")
-            break
+            logging.error(f"Error HTTP (startAt={start_at}, attempt {attempt}/{max_page_attempts}): "
+                          f"{err.response.status_code} - {err.response.text}")
         except Exception as e:
-            logging.error(f"Erros: {str(e)}")
-            break
+            logging.error(f"Erros (startAt={start_at}, attempt {attempt}/{max_page_attempts}): {str(e)}")
+        if attempt < max_page_attempts:
+            sleep(2 ** attempt)
+    return None
+
+
+def fetch_issues(jql, start_at, max_results, max_workers=max_fetch_workers, fields=None):
+    # PER CALL - A FAILED RUN NEVER LEAKS INTO THE NEXT fetch_issues OF THE SAME PROCESS
+    failed_pages = []
+    first_page = fetch_page(jql, start_at, max_results, fields)
+    if first_page is None:
+        raise PageFetchError(f"The first page (startAt={start_at}) could not be fetched.")
+    if not first_page['issues']:
+        return
+    logging.info(f"Issue(s) found: {len(first_page['issues'])}.")
+    yield first_page['issues']
+
+    # THE SERVER MAY CAP maxResults, SO THE FIRST PAGE DEFINES THE WINDOW SIZE #
+    page_size = len(first_page['issues'])
+    total = first_page.get('total', start_at + page_size)
+    page_starts = iter(range(start_at + page_size, total, page_size))
+    del first_page
+
+    # ONLY max_workers * 2 PAGES ARE IN FLIGHT, SO MEMORY DOES NOT GROW WITH THE RESULT SET #
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(
+            (page_start, executor.submit(fetch_page, jql, page_start, page_size, fields))
+            for page_start in islice(page_starts, max_workers * 2)
+        )
+        while pending:
+            page_start, future = pending.popleft()
+            page = future.result()
+            next_start = next(page_starts, None)
+            if next_start is not None:
+                pending.append((next_start, executor.submit(fetch_page, jql, next_start, page_size, fields)))
+            if page is None:
+                failed_pages.append(page_start)
+                continue
+            logging.info(f"Issue(s) found: {len(page['issues'])}.")
+            yield page['issues']
+
+    # RAISED AFTER THE LAST PAGE SO NOTHING DOWNSTREAM TREATS A PARTIAL RESULT AS A COMPLETE ONE #
+    if failed_pages:
+        raise PageFetchError(f"{len(failed_pages)} page(s) could not be fetched, startAt: {failed_pages}")
+
+
+def iter_issues(pages):
+    for page in pages:
+        yield from page
 
 
 # STATUS MAPPING AND GROUPING NAMES (IN PT-BR) #
+STATUS_MAPPING = {
+    'OPEN': 'NÃO INICIADA',
+    'TO DO': 'NÃO INICIADA',
+    'REVIEW': 'ANALISE',
+    'DRAFT': 'RASCUNHO',
+    'DEVELOPMENT COMPLETED': 'IMPLEMENTADA',
+    'DONE': 'ENCERRADA',
+    'IN ANALYSIS': 'ANALISE',
+    'ANALISYS APPROVED': 'ANALISE',
+    'ESTIMATE': 'ESTIMATIVA',
+    'QUOTED': 'ESTIMATIVA',
+    'QUOTED APPROVED': 'ESTIMATIVA',
+    'WAITING FOR ESTIMATE': 'ESTIMATIVA',
+    'WAITING EVALUATION': 'ESTIMATIVA',
+    'QUOTE SENT': 'ESTIMATIVA',
+    'ESTIMATION DONE': 'ESTIMATIVA',
+    'SELECTED FOR DEVELOPMENT': 'DESENVOLVIMENTO',
+    'DEVELOPMENT AUTHORIZED': 'DESENVOLVIMENTO',
+    'IN DEVELOPMENT': 'DESENVOLVIMENTO',
+    'IN PROGRESS': 'DESENVOLVIMENTO',
+    'DEVELOPMENT IN PROGRESS': 'DESENVOLVIMENTO',
+    'IN QA': 'DESENVOLVIMENTO',
+    'WAITING FOR QA': 'DESENVOLVIMENTO',
+    'WAITING FOR UAT': 'UAT',
+    'RELEASED NOT IN PRODUCTION': 'UAT',
+    'FIRST DELIVERY/RELEASED TO TEST': 'IMPLEMENTADA',
+    'VERIFIY OK': 'IMPLEMENTADA',
+    'FINAL DELIVERY / RELEASED': 'IMPLEMENTADA',
+    'IN UAT': 'EM TESTE',
+    'READY FOR PRODUCTION': 'UAT FINALIZADO',
+    'UAT DONE': 'UAT FINALIZADO',
+    'CLOSED': 'ENCERRADA',
+    'PRODUCTION APPROVED': 'IMPLEMENTADA',
+    'AWAITING THIRD PARTY': 'DESENVOLVIMENTO',
+    'CANCELED': 'CANCELADA',
+    'CANCELLED': 'CANCELADA',
+    'REJECTED': 'CANCELADA',
+    'DEFERRED': 'CANCELADA',
+    'BONIFICA': 'ESTIMATIVA',
+    'RELEASED': 'ENCERRADA',
+    'PENDING': 'OUTRO',
+    'CONFIRM RELEASED': 'ENCERRADA',
+    'RELEASE COMPLETED': 'ENCERRADA',
+    'DEFINITION': 'NÃO INICIADA',
+    'WAITING APPROVAL': 'APROVAÇÃO',
+    'APPROVED': 'APROVADA',
+    'APPROVED BY BUSINESS': 'APROVADA',
+    'WAITING FOR CONTRACT APPROVAL': 'APROVAÇÃO',
+    'ESTIMATION APPROVAL': 'ESTIMATIVA'
+}
+
+
 def map_de_para_status(status):
-    status_mapping = {
-        'OPEN': 'NÃO INICIADA',
-        'TO DO': 'NÃO INICIADA',
-        'REVIEW': 'ANALISE',
-        'DRAFT': 'RASCUNHO',
-        'DEVELOPMENT COMPLETED': 'IMPLEMENTADA',
-        'DONE': 'ENCERRADA',
-        'IN ANALYSIS': 'ANALISE',
-        'ANALISYS APPROVED': 'ANALISE',
-        'ESTIMATE': 'ESTIMATIVA',
-        'QUOTED': 'ESTIMATIVA',
-        'QUOTED APPROVED': 'ESTIMATIVA',
-        'WAITING FOR ESTIMATE': 'ESTIMATIVA',
-        'WAITING EVALUATION': 'ESTIMATIVA',
-        'QUOTE SENT': 'ESTIMATIVA',
-        'ESTIMATION DONE': 'ESTIMATIVA',
-        'SELECTED FOR DEVELOPMENT': 'DESENVOLVIMENTO',
-        'DEVELOPMENT AUTHORIZED': 'DESENVOLVIMENTO',
-        'IN DEVELOPMENT': 'DESENVOLVIMENTO',
-        'IN PROGRESS': 'DESENVOLVIMENTO',
-        'DEVELOPMENT IN PROGRESS': 'DESENVOLVIMENTO',
-        'IN QA': 'DESENVOLVIMENTO',
-        'WAITING FOR QA': 'DESENVOLVIMENTO',
-        'WAITING FOR UAT': 'UAT',
-        'RELEASED NOT IN PRODUCTION': 'UAT',
-        'FIRST DELIVERY/RELEASED TO TEST': 'IMPLEMENTADA',
-        'VERIFIY OK': 'IMPLEMENTADA',
-        'FINAL DELIVERY / RELEASED': 'IMPLEMENTADA',
-        'IN UAT': 'EM TESTE',
-        'READY FOR PRODUCTION': 'UAT FINALIZADO',
-        'UAT DONE': 'UAT FINALIZADO',
-        'CLOSED': 'ENCERRADA',
-        'PRODUCTION APPROVED': 'IMPLEMENTADA',
-        'AWAITING THIRD PARTY': 'DESENVOLVIMENTO',
-        'CANCELED': 'CANCELADA',
-        'CANCELLED': 'CANCELADA',
-        'REJECTED': 'CANCELADA',
-        'DEFERRED': 'CANCELADA',
-        'BONIFICA': 'ESTIMATIVA',
-        'RELEASED': 'ENCERRADA',
-        'PENDING': 'OUTRO',
-        'CONFIRM RELEASED': 'ENCERRADA',
-        'RELEASE COMPLETED': 'ENCERRADA',
-        'DEFINITION': 'NÃO INICIADA',
-        'WAITING APPROVAL': 'APROVAÇÃO',
-        'APPROVED': 'APROVADA',
-        'APPROVED BY BUSINESS': 'APROVADA',
-        'WAITING FOR CONTRACT APPROVAL': 'APROVAÇÃO',
-        'ESTIMATION APPROVAL': 'ESTIMATIVA'
-    }
     normalized_status = status.upper().strip()
-    return status_mapping.get(normalized_status, 'OUTRO')
+    return STATUS_MAPPING.get(normalized_status, 'OUTRO')
 
 
-# FIELDS #
-def process_issues(issues):
-    processed_issues_list = []
-    for issue in issues:
-        fields = issue.get('fields', {})
-        components = ', '.join([comp['name'] for comp in fields.get('components', [])])
-        project_name = fields.get('project', {}).get('name', 'N/A')
-        assignee = fields.get('assignee', {})
-        status = fields.get('status', {})
-        status_name = status.get('name', 'N/A')
-        status_description = map_de_para_status(status_name)
-        issue_key = issue.get('key', 'N/A')
-        summary = fields.get('summary', 'N/A')
-
-        create_dt = fields.get('created')
-        create_dt = create_dt if create_dt else '1999-01-01T00:00:00.000+0000'
-        create_dt = datetime.strptime(create_dt, "%Y-%m-%dT%H:%M:%S.%f%z").replace(tzinfo=None)
-
-        update_dt = fields.get('updated')
-        update_dt = update_dt if update_dt else '1999-01-01T00:00:00.000+0000'
-        update_dt = datetime.strptime(update_dt, "%Y-%m-%dT%H:%M:%S.%f%z").replace(tzinfo=None)
-
-        start_dt = fields.get('customfield_10201')
-        start_dt = start_dt if start_dt else '1999-01-01'
-        start_dt = datetime.strptime(start_dt, "%Y-%m-%d").replace(tzinfo=None)
-
-        end_dt = fields.get('customfield_10200')
-        end_dt = end_dt if end_dt else '1999-01-01'
-        end_dt = datetime.strptime(end_dt, "%Y-%m-%d").replace(tzinfo=None)
-
-        actual_dev_dt = fields.get('customfield_15475')
-        actual_dev_dt = actual_dev_dt if actual_dev_dt else '1999-01-01'
-        actual_dev_dt = datetime.strptime(actual_dev_dt, "%Y-%m-%d").replace(tzinfo=None)
-
-        issue_type = fields.get('issuetype', {}).get('name', 'N/A')
-        priority = fields.get('priority', {}).get('name', 'N/A') if isinstance(fields.get('priority', {}),
-                                                                                   dict) else 'N/A'
-        providers = ', '.join([provider['value'] for provider in fields.get('customfield_15338', [])]) if fields.get(
-                'customfield_15338') else 'N/A'
-        pais_value = fields.get('customfield_11700')
-        pais = pais_value['value'] if pais_value else 'N/A'
-        labels = ', '.join(fields.get('labels', []))
-
-        contract_id_field = fields.get('customfield_16427')
-        contract_id = contract_id_field if contract_id_field else 'N/A'
-
-        providers_issue_field = fields.get('customfield_21508')
-        if providers_issue_field is not None:
-            providers_issue_summary = providers_issue_field.get('fields', {}).get('summary', 'N/A')
-            providers_issue = providers_issue_summary if providers_issue_summary != 'N/A' else 'N/A'
-        else:
-            providers_issue = 'N/A'
-
-        providers_issue = providers_issue.replace("SISTEMAS COMERCIALES DE BRASIL TECNOLOGIA DA INFORMAÐ£Â‡Ð£ÂƒO",
-                                                      "AYESA")
-        providers_issue = providers_issue.replace("ENGINEERING DO BRASIL S A", "ENGINEERING DO BRASIL")
-        providers_issue = providers_issue.replace("Engineering", "ENGINEERING DO BRASIL")
-
-        apm_tcr_value = fields.get('customfield_14613')
-        apm_tcr = ', '.join(apm_tcr_value) if isinstance(apm_tcr_value, list) else apm_tcr_value
-        apm_bcr_value = fields.get('customfield_37200')
-        apm_bcr = ', '.join(apm_bcr_value) if isinstance(apm_bcr_value, list) else apm_bcr_value
-
-        if apm_tcr and apm_bcr:
-            apm = f"{apm_tcr} - {apm_bcr}"
-        elif apm_tcr:
-            apm = apm_tcr
-        elif apm_bcr:
-            apm = apm_bcr
-        else:
-            apm = "N/A"
-
-        # Extract the custom field "Contract Manager"
-        contract_manager_field = fields.get('customfield_34700')
-        if contract_manager_field:
-            if isinstance(contract_manager_field, list):
-                contract_manager = ", ".join([user.get('displayName', 'N/A') for user in contract_manager_field])
-            elif isinstance(contract_manager_field, dict):
-                contract_manager = contract_manager_field.get('displayName', 'N/A')
-            else:
-                contract_manager = str(contract_manager_field)
-        else:
-            contract_manager = 'N/A'
-
-        # Extract the custom field "Contract Delegate"
-        contract_delegate_field = fields.get('customfield_37500')
-        if contract_delegate_field:
-            if isinstance(contract_delegate_field, list):
-                contract_delegate = ", ".join([user.get('displayName', 'N/A') for user in contract_delegate_field])
-            elif isinstance(contract_delegate_field, dict):
-                contract_delegate = contract_delegate_field.get('displayName', 'N/A')
-            else:
-                contract_delegate = str(contract_delegate_field)
-        else:
-            contract_delegate = 'N/A'
-
-        # Extract the custom field "Approval Need"
-        approval_need_field = fields.get('customfield_30001')
-        if approval_need_field:
-            if isinstance(approval_need_field, dict):
-                approval_need = approval_need_field.get('value', 'N/A')
-            else:
-                approval_need = str(approval_need_field)
-        else:
-            approval_need = 'N/A'
+# FIELDS - OUTPUT COLUMN, EXTRACTOR KIND, SOURCE FIELD(S) AND OPTIONS #
+# ADDING A CUSTOMFIELD TO THE REPORT IS ONE MORE LINE HERE, SEE jira_fieldmap.py FOR THE KINDS #
+PROVIDER_NAMES = (
+    ("SISTEMAS COMERCIALES DE BRASIL TECNOLOGIA DA INFORMAÐ£Â‡Ð£ÂƒO", "AYESA"),
+    ("ENGINEERING DO BRASIL S A", "ENGINEERING DO BRASIL"),
+    ("Engineering", "ENGINEERING DO BRASIL"),
+)
 
-        assignee_name = assignee['displayName'] if assignee else 'Unassigned'
+FIELD_MAP = (
+    FieldSpec('issue_key', 'key'),
+    FieldSpec('issue_type', 'path', 'issuetype', arg=('name',)),
+    FieldSpec('project_name', 'path', 'project', arg=('name',)),
+    FieldSpec('summary', 'raw', 'summary'),
+    FieldSpec('priority', 'path', 'priority', arg=('name',)),
+    FieldSpec('status', 'path', 'status', arg=('name',), upper=True),
+    FieldSpec('components', 'join', 'components', default='', arg='name'),
+    FieldSpec('providers_issue', 'path', 'customfield_21508', arg=('fields', 'summary'), replace=PROVIDER_NAMES),
+    FieldSpec('create_dt', 'datetime', 'created'),
+    FieldSpec('update_dt', 'datetime', 'updated'),
+    FieldSpec('status_description', 'mapped_name', 'status', default='OUTRO', arg=STATUS_MAPPING, upper=True),
+    FieldSpec('assignee', 'users', 'assignee', default='Unassigned'),
+    FieldSpec('providers', 'join', 'customfield_15338', arg='value', upper=True),
+    FieldSpec('pais', 'option', 'customfield_11700'),
+    FieldSpec('labels', 'join', 'labels', default=''),
+    FieldSpec('apm', 'concat', ('customfield_14613', 'customfield_37200')),
+    FieldSpec('contract_manager', 'users', 'customfield_34700'),
+    FieldSpec('contract_delegate', 'users', 'customfield_37500'),
+    FieldSpec('approval_need', 'option', 'customfield_30001'),
+    FieldSpec('rfc_target_start', 'date_str', 'customfield_10402'),
+    FieldSpec('rfc_target_end', 'date_str', 'customfield_10403'),
+    FieldSpec('rfc_target_start_time', 'time_str', 'customfield_22102'),
+    FieldSpec('rfc_target_end_time', 'time_str', 'customfield_22101'),
+    FieldSpec('rfc_source_environment', 'raw', 'customfield_24703', default='NO STATUS'),
+    FieldSpec('rfc_target_environment', 'raw', 'customfield_24704', default='NO STATUS'),
+    FieldSpec('rfc_status', 'raw', 'customfield_25919', default='NO STATUS'),
+    FieldSpec('rfc_change_type', 'raw', 'customfield_16423', default='NA'),
+    FieldSpec('rfc_release_type', 'option', 'customfield_22203', default=''),
+    FieldSpec('rfc_apm_name', 'raw', 'customfield_16424', default='NA'),
+    FieldSpec('rfc_provider_name', 'raw', 'customfield_16426', default='NA'),
+    FieldSpec('rfc_contract_id', 'raw', 'customfield_16427', default='NA'),
+    FieldSpec('rfc_auth_note', 'raw', 'customfield_16406', default='NA'),
+    FieldSpec('rfc_contents_key_value', 'path', 'customfield_38400', arg=(0, 'key')),
+    FieldSpec('rfc_contents_type_value', 'path', 'customfield_38400', arg=(0, 'fields', 'issuetype', 'name')),
+    FieldSpec('rfc_approvedby', 'users', 'customfield_12015'),
+    FieldSpec('rfc_description', 'raw', 'description', default=None),
+    FieldSpec('rfc_reporter_name', 'users', 'reporter'),
+    FieldSpec('rfc_rollback', 'option', 'customfield_21600'),
+    FieldSpec('contract_id', 'or', 'customfield_16427'),
+)
 
-        rfc_source_environment = issue['fields'].get('customfield_24703', 'NO STATUS')
-        rfc_target_environment = issue['fields'].get('customfield_24704', 'NO STATUS')
+# COMPILED ONCE - process_issue RUNS ONLY THE PREBUILT ACCESSORS FOR EACH ISSUE #
+process_issue = compile_field_map(FIELD_MAP)
 
-        rfc_status = issue['fields'].get('customfield_25919', 'NO STATUS')
-        rfc_change_type = issue['fields'].get('customfield_16423', 'NA')
-        rfc_release_type = (issue['fields'].get('customfield_22203') or {}).get('value', '')
-        rfc_apm_name = issue['fields'].get('customfield_16424', 'NA')
-        rfc_provider_name = issue['fields'].get('customfield_16426', 'NA')
-        rfc_contract_id = issue['fields'].get('customfield_16427', 'NA')
-        rfc_auth_note = issue['fields'].get('customfield_16406', 'NA')
+# ONLY THE FIELDS READ BY FIELD_MAP ARE REQUESTED #
+report_fields = required_fields(FIELD_MAP)
 
-        rfc_contents_key_field = fields.get('customfield_38400', [])
-        if rfc_contents_key_field:
-            rfc_contents_key = rfc_contents_key_field[0].get('key', 'N/A')
-            rfc_contents_key_value = rfc_contents_key if rfc_contents_key != 'N/A' else 'N/A'
-        else:
-            rfc_contents_key_value = 'N/A'
 
-        rfc_contents_field_type = fields.get('customfield_38400', [])
-        if rfc_contents_field_type:
-            rfc_contents_type = rfc_contents_field_type[0].get('fields', {}).get('issuetype', {}).get('name', 'N/A')
-            rfc_contents_type_value = rfc_contents_type if rfc_contents_type != 'N/A' else 'N/A'
-        else:
-            rfc_contents_type_value = 'N/A'
-
-        rfc_approvedby_field = issue['fields'].get('customfield_12015')
-        rfc_approvedby = rfc_approvedby_field['displayName'] if rfc_approvedby_field else "N/A"
-
-        rfc_target_start = (datetime.strptime(fields.get('customfield_10402') or '1999-01-01', '%Y-%m-%d')).strftime(
-            '%d/%m/%Y')
-        rfc_target_end = (datetime.strptime(fields.get('customfield_10403') or '1999-01-01', '%Y-%m-%d')).strftime(
-            '%d/%m/%Y')
-
-        rfc_target_start_time = (datetime.strptime(fields.get('customfield_22102') or '00:00', "%H:%M")).strftime(
-            '%H:%M')
-        rfc_target_end_time = (datetime.strptime(fields.get('customfield_22101') or '00:00', "%H:%M")).strftime(
-            '%H:%M')
-
-        rfc_description = issue['fields']['description']
-        rfc_reporter_name= issue['fields']['reporter']['displayName']
-
-        rfc_rollback_field = issue['fields'].get('customfield_21600')
-        rfc_rollback = rfc_rollback_field['value'] if rfc_rollback_field else "N/A"
-
-        processed_issues_list.append({
-            'issue_key': issue_key,
-            'issue_type': issue_type,
-            'project_name': project_name,
-            'summary': summary,
-            'priority': priority,
-            'status': status_name.upper(),
-            'components': components,
-            'providers_issue': providers_issue,
-            'create_dt': create_dt,
-            'update_dt': update_dt,
-            'status_description': status_description.upper(),
-            'assignee': assignee_name,
-            'providers': providers.upper(),
-            'pais': pais,
-            'labels': labels,
-            'apm': apm,
-            'contract_manager': contract_manager,
-            'contract_delegate': contract_delegate,
-            'approval_need': approval_need,
-            'rfc_target_start': rfc_target_start,
-            'rfc_target_end': rfc_target_end,
-            'rfc_target_start_time':rfc_target_start_time,
-            'rfc_target_end_time': rfc_target_end_time,
-            'rfc_source_environment': rfc_source_environment,
-            'rfc_target_environment': rfc_target_environment,
-            'rfc_status': rfc_status,
-            'rfc_change_type': rfc_change_type,
-            'rfc_release_type': rfc_release_type,
-            'rfc_apm_name': rfc_apm_name,
-            'rfc_provider_name': rfc_provider_name,
-            'rfc_contract_id': rfc_contract_id,
-            'rfc_auth_note': rfc_auth_note,
-            'rfc_contents_key_value': rfc_contents_key_value,
-            'rfc_contents_type_value': rfc_contents_type_value,
-            'rfc_approvedby': rfc_approvedby,
-            'rfc_description': rfc_description,
-            'rfc_reporter_name': rfc_reporter_name,
-            'rfc_rollback': rfc_rollback,
-            'contract_id': contract_id
-        })
+# PARALLEL NORMALIZATION - PAGES ARE NORMALIZED IN A PROCESS POOL WHEN normalize_workers > 1 #
+# RUNS SMALLER THAN normalize_min_issues STAY SERIAL TO AVOID THE POOL STARTUP COST #
+normalize_workers = 1
+normalize_min_issues = 5000
+
+
+def process_issues(issues):
+    for issue in issues:
+        yield process_issue(issue)
     logging.info("Campos processados com sucesso.")
-    return processed_issues_list
 
 
-# SAVING EXCEL FILE #
-def save_to_excel(issues, filename='Issue_Extraction.xlsx'):
-    wb = openpyxl.Workbook()
-    default_sheet = wb.active
-    wb.remove(default_sheet)
-    issues = sorted(issues, key=lambda x: x['issue_key'])
-
-    # Cria as abas
-    ws_jiras = wb.create_sheet(title="ISSUESTAB1")
-    ws_cancelados = wb.create_sheet(title="ISSUESTAB2")
-    ws_implementados = wb.create_sheet(title="ISSUESTAB3")
-    ws_support_esp = wb.create_sheet(title="ISSUESTAB4")
-
-    headers = ['ID', 'Projeto', 'Tipo', 'Sumário', 'Prioridade', 'Status JIRA', 'Status', 'Provider',
-               'Assignee', 'Criado Em', 'Atualizado Em', 'Componentes', 'Labels', 'APM List']
-    for ws in (ws_jiras, ws_cancelados, ws_implementados, ws_support_esp):
-        ws.append(headers)
-
-    jiras_row_index = 2
-    cancelados_row_index = 2
-    implementados_row_index = 2
-    support_esp_row_index = 2
+def process_pages(pages, max_workers=None, min_issues=None):
+    max_workers = normalize_workers if max_workers is None else max_workers
+    min_issues = normalize_min_issues if min_issues is None else min_issues
+    if max_workers <= 1:
+        yield from process_issues(iter_issues(pages))
+        return
+    yield from normalize_parallel(pages, FIELD_MAP, max_workers, min_issues)
+    logging.info("Campos processados com sucesso.")
 
-    for issue in issues:
-        if issue['issue_type'] not in ("Provider", "RFC"):
-            row = [
-                issue['issue_key'],
-                issue['project_name'],
-                issue['issue_type'],
-                issue['summary'],
-                issue['priority'],
-                issue['status'],
-                issue['status_description'],
-                issue['providers_issue'],
-                issue['assignee'],
-                issue['create_dt'],
-                issue['update_dt'],
-                issue['components'],
-                issue['labels'],
-                issue['apm']
-            ]
-
-            if issue['status'] in ['CANCELED', 'REJECTED', 'CANCELLED']:
-                current_sheet = ws_cancelados
-                row_index = cancelados_row_index
-                cancelados_row_index += 1
-            elif issue['issue_type'] == "TYPE1":
-                current_sheet = ws_support_esp
-                row_index = support_esp_row_index
-                support_esp_row_index += 1
-            elif issue['status'] in ['CONFIRM RELEASED', 'RELEASED', 'RELEASE COMPLETED']:
-                current_sheet = ws_implementados
-                row_index = implementados_row_index
-                implementados_row_index += 1
-            else:
-                current_sheet = ws_jiras
-                row_index = jiras_row_index
-                jiras_row_index += 1
-
-            for col_index, item in enumerate(row, start=1):
-                cell = current_sheet.cell(row=row_index, column=col_index)
-                if isinstance(item, datetime):
-                    cell.value = item
-                    cell.style = date_style
-                elif isinstance(item, time):
-                    cell.value = item.strftime('%H:%M')
-                else:
-                    cell.value = item
-
-    # CREATE TAB 5 - USE IF THE NEW TAB HAVE DIFFERENT HEADER #
-    ws_providers = wb.create_sheet(title="ISSUETAB5")
-    headers_providers = ['ID', 'Projeto', 'Tipo', 'Sumário', 'Status JIRA', 'Contract ID', 'Assignee', 'Contract Approval Need',
-                         'Contract Manager', 'Contract Manager Delegate']
-    ws_providers.append(headers_providers)
-    providers_row_index = 2
 
-    for issue in issues:
-        if issue['issue_type'] == "ISSUETYPE3":
-            ws_providers.append([
-                issue['issue_key'], issue['issue_type'], issue['project_name'], issue['summary'], issue['status'],
-                issue['contract_id'], issue['assignee'], issue['approval_need'], issue['contract_manager'], issue['contract_delegate']
-            ])
-
-            if issue['status'] in ['ISSUETAB5']:
-                current_sheet = ws_providers
-                row_index = providers_row_index
-                providers_row_index += 1
-
-    # CREATE TAB 6 - USE IF THE NEW TAB HAVE DIFFERENT HEADER #
-    ws_rfc = wb.create_sheet(title="ISSUETASB6")
-    headers_rfc = ['ID', 'Projeto', 'Tipo', 'Status RFC', 'Sumário', 'Start', 'Start Time', 'End', 'End Time',
-                  'Source', 'Target', 'Rollback', 'Change Type', 'Release Type', 'APM Name', 'Provider', 'Contract', 'Nota CAB', 'Aprovado Por',
-                   'Issue', 'Issue Type', 'RFC Descrição', 'Aberto Por']
-    ws_rfc.append(headers_rfc)
-    rfc_row_index = 2
+# REPORT TABS - TITLE: (HEADERS, DATE COLUMNS) #
+MAIN_HEADERS = ['ID', 'Projeto', 'Tipo', 'Sumário', 'Prioridade', 'Status JIRA', 'Status', 'Provider',
+                'Assignee', 'Criado Em', 'Atualizado Em', 'Componentes', 'Labels', 'APM List']
+REPORT_TABS = {
+    "ISSUESTAB1": (MAIN_HEADERS, (9, 10)),
+    "ISSUESTAB2": (MAIN_HEADERS, (9, 10)),
+    "ISSUESTAB3": (MAIN_HEADERS, (9, 10)),
+    "ISSUESTAB4": (MAIN_HEADERS, (9, 10)),
+    # TAB 5 - USE IF THE NEW TAB HAVE DIFFERENT HEADER #
+    "ISSUETAB5": (['ID', 'Projeto', 'Tipo', 'Sumário', 'Status JIRA', 'Contract ID', 'Assignee',
+                   'Contract Approval Need', 'Contract Manager', 'Contract Manager Delegate'], ()),
+    # TAB 6 - USE IF THE NEW TAB HAVE DIFFERENT HEADER #
+    "ISSUETASB6": (['ID', 'Projeto', 'Tipo', 'Status RFC', 'Sumário', 'Start', 'Start Time', 'End', 'End Time',
+                    'Source', 'Target', 'Rollback', 'Change Type', 'Release Type', 'APM Name', 'Provider', 'Contract',
+                    'Nota CAB', 'Aprovado Por', 'Issue', 'Issue Type', 'RFC Descrição', 'Aberto Por'], ()),
+}
+
+
+def main_tab(issue):
+    if issue['status'] in ('CANCELED', 'REJECTED', 'CANCELLED'):
+        return "ISSUESTAB2"
+    if issue['issue_type'] == "TYPE1":
+        return "ISSUESTAB4"
+    if issue['status'] in ('CONFIRM RELEASED', 'RELEASED', 'RELEASE COMPLETED'):
+        return "ISSUESTAB3"
+    return "ISSUESTAB1"
+
+
+# ROUTES ONE ISSUE TO EVERY TAB IT BELONGS TO, AS (TAB, ROW) #
+def route_issue(issue):
+    if issue['issue_type'] not in ("Provider", "RFC"):
+        yield main_tab(issue), [
+            issue['issue_key'], issue['project_name'], issue['issue_type'], issue['summary'], issue['priority'],
+            issue['status'], issue['status_description'], issue['providers_issue'], issue['assignee'],
+            issue['create_dt'], issue['update_dt'], issue['components'], issue['labels'], issue['apm']
+        ]
+
+    if issue['issue_type'] == "ISSUETYPE3":
+        yield "ISSUETAB5", [
+            issue['issue_key'], issue['issue_type'], issue['project_name'], issue['summary'], issue['status'],
+            issue['contract_id'], issue['assignee'], issue['approval_need'], issue['contract_manager'],
+            issue['contract_delegate']
+        ]
+
+    if issue['issue_type'] == "ISSUETYPE2":
+        yield "ISSUETASB6", [
+            issue['issue_key'], issue['project_name'], issue['issue_type'], issue['status'], issue['summary'],
+            issue['rfc_target_start'], issue['rfc_target_start_time'], issue['rfc_target_end'],
+            issue['rfc_target_end_time'],
+            ", ".join(issue['rfc_source_environment']) if isinstance(issue['rfc_source_environment'], list) else
+            issue['rfc_source_environment'],
+            ", ".join(issue['rfc_target_environment']) if isinstance(issue['rfc_target_environment'], list) else
+            issue['rfc_target_environment'], issue['rfc_rollback'],
+            issue['rfc_change_type'], issue['rfc_release_type'], issue['rfc_apm_name'], issue['rfc_provider_name'],
+            issue['rfc_contract_id'],
+            issue['rfc_auth_note'], issue['rfc_approvedby'], issue['rfc_contents_key_value'],
+            issue['rfc_contents_type_value'],
+            issue['rfc_description'], issue['rfc_reporter_name']
+        ]
+
+
+# SAVING THE REPORT - xlsx, csv, ndjson OR parquet (CSV/NDJSON/PARQUET WRITE ONE FILE PER TAB) #
+output_format = 'xlsx'
+report_filename = 'Issue_Extraction'
+
+
+def save_report(issues, output_format=output_format, filename=report_filename):
+    writer = WRITERS[output_format](filename, REPORT_TABS)
+    total_issues = write_report(issues, writer, route_issue)
+    # OPENS THE WORKBOOK ON WINDOWS, LIKE BEFORE - os.startfile DOES NOT EXIST ON LINUX #
+    if output_format == 'xlsx' and hasattr(os, 'startfile'):
+        os.startfile(writer.outputs[0])
+    return total_issues
+
+
+def save_to_excel(issues, filename='Issue_Extraction.xlsx'):
+    return save_report(issues, 'xlsx', filename)
 
+
+# INCREMENTAL EXTRACTION #
+def track_latest_update(issues, latest):
     for issue in issues:
-        if issue['issue_type'] == "ISSUETYPE2":
-            ws_rfc.append([
-                issue['issue_key'], issue['project_name'], issue['issue_type'], issue['status'], issue['summary'],
-                issue['rfc_target_start'], issue['rfc_target_start_time'], issue['rfc_target_end'],
-                issue['rfc_target_end_time'],
-                ", ".join(issue['rfc_source_environment']) if isinstance(issue['rfc_source_environment'], list) else
-                issue['rfc_source_environment'],
-                ", ".join(issue['rfc_target_environment']) if isinstance(issue['rfc_target_environment'], list) else
-                issue['rfc_target_environment'], issue['rfc_rollback'],
-                issue['rfc_change_type'], issue['rfc_release_type'], issue['rfc_apm_name'], issue['rfc_provider_name'],
-                issue['rfc_contract_id'],
-                issue['rfc_auth_note'], issue['rfc_approvedby'], issue['rfc_contents_key_value'],
-                issue['rfc_contents_type_value'],
-                issue['rfc_description'], issue['rfc_reporter_name']
-            ])
-
-            if issue['status'] in ['ISSUETASB6']:
-                current_sheet = ws_rfc
-                row_index = rfc_row_index
-                rfc_row_index += 1
-
-            for col_index, item in enumerate(row, start=1):
-                cell = current_sheet.cell(row=row_index, column=col_index)
-                if isinstance(item, datetime):
-                    cell.value = item
-                    cell.style = date_style
-                elif isinstance(item, time):
-                    cell.value = item.strftime('%H:%M')
-                else:
-                    cell.value = item
-
-    wb.save(filename)
-    logging.info(f"Issues exported to: '{filename}'")
-    os.startfile(filename)
+        if latest['update_dt'] is None or issue['update_dt'] > latest['update_dt']:
+            latest['update_dt'] = issue['update_dt']
+        yield issue
+
+
+def extract_incremental(store, projects):
+    jql_query = build_jql(projects, type_keys)
+    watermark = store.get_meta('watermark')
+    if store.get_meta('jql') != jql_query:
+        # PROJECTS OR TYPES CHANGED - THE SNAPSHOT NO LONGER MATCHES THE QUERY #
+        watermark = None
+
+    updated_since = None
+    if watermark:
+        updated_since = datetime.fromisoformat(watermark) - timedelta(minutes=incremental_overlap_minutes)
+    jql = build_jql(projects, type_keys, updated_since)
+    logging.info(f"Running {'incremental' if updated_since else 'full'} extraction: {jql}")
+
+    latest = {'update_dt': datetime.fromisoformat(watermark) if watermark else None}
+    pages = fetch_issues(jql, start_at_index, max_results_per_query, fields=report_fields)
+    processed_issues = track_latest_update(process_pages(pages), latest)
+
+    # replace_all / upsert RUN IN ONE TRANSACTION - A PageFetchError ROLLS THE SNAPSHOT BACK #
+    try:
+        if updated_since is None:
+            fetched = store.replace_all(processed_issues)
+        else:
+            fetched = store.upsert(processed_issues)
+            if reconcile_deleted:
+                key_pages = fetch_issues(jql_query, start_at_index, max_results_per_query, fields=['key'])
+                removed = store.delete_missing(issue['key'] for issue in iter_issues(key_pages))
+                logging.info(f"{removed} issue(s) deleted or moved out of the query removed from the snapshot.")
+    except PageFetchError:
+        logging.error("Some pages failed, the snapshot and the watermark were left as they were.")
+        raise
+    logging.info(f"{fetched} issue(s) merged into '{store.path}', {store.count()} in the snapshot.")
+
+    store.set_meta('watermark', latest['update_dt'].isoformat() if latest['update_dt'] else None)
+    store.set_meta('jql', jql_query)
+    store.set_meta('last_run', datetime.now().isoformat(timespec='seconds'))
+    return fetched
 
 
 # RUN SCRIPT #
+def main():
+    if offline_report:
+        with IssueStore(snapshot_file) as store:
+            total_issues = save_report(store.iter_issues())
+    elif incremental_extraction:
+        with IssueStore(snapshot_file) as store:
+            extract_incremental(store, find_projects(search_terms))
+            total_issues = save_report(store.iter_issues())
+    else:
+        jql_query = build_jql(find_projects(search_terms), type_keys)
+        logging.info(f"Running Query: {jql_query}")
+        # PAGES -> ISSUES -> NORMALIZED ROWS -> EXCEL, WITHOUT HOLDING THE WHOLE RESULT SET #
+        # A PageFetchError STOPS THE WRITER BEFORE IT SAVES, THE PREVIOUS REPORT IS KEPT #
+        pages = fetch_issues(jql_query, start_at_index, max_results_per_query, fields=report_fields)
+        processed_issues = process_pages(pages)
+        total_issues = save_report(processed_issues)
+    logging.info(f"Extracted {total_issues} issues successfully.")
+
+
 if __name__ == "__main__":
-    fetch_issues(jql_query, start_at_index, max_results_per_query)
-    processed_issues = process_issues(all_jira_issues)
-    save_to_excel(processed_issues)
-    logging.info(f"Extracted {len(all_jira_issues)} issues successfully.")
+    try:
+        main()
+    except PageFetchError as err:
+        logging.error(f"Extraction aborted, no report written: {err}")
+        raise SystemExit(1)
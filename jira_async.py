@@ -0,0 +1,486 @@
+import os
+import json
+import time
+import asyncio
+import aiohttp
+from typing import Any, Dict, List, Optional
+from requests.exceptions import HTTPError, ConnectionError, Timeout
+from jira_auth import (BASE_URL, RateLimiter, rate_limiter, backoff, _number,
+                       MAX_RETRIES, MAX_RATE_LIMIT_RETRIES, RETRY_STATUS, IDEMPOTENT_METHODS)
+from jira_metrics import metrics, endpoint_template
+from jira_roles import GOVERNANCE_GROUP, GOVERNANCE_ROLES, USER_ACTOR, GROUP_ACTOR, _actor_names
+from jira_profields import ProjectField, FIELD_WORKERS, _parse_values, _changed
+
+# REQUESTS IN FLIGHT AT THE SAME TIME PER CLIENT #
+MAX_CONCURRENCY = 20
+
+
+class AsyncResponse:
+
+    def __init__(self, status_code: int, headers, text: str, url: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.url = url
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class AsyncJiraClient:
+
+    def __init__(
+            self,
+            base_url: str = BASE_URL,
+            token: Optional[str] = None,
+            max_concurrency: int = MAX_CONCURRENCY,
+            limiter: RateLimiter = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {token or os.getenv('JIRA_TOKEN')}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        self.max_concurrency = max_concurrency
+        self.limiter = limiter or rate_limiter
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            # ONE KEEP-ALIVE CONNECTION PER CONCURRENT REQUEST
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _send(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        async with self._semaphore:
+            async with self.session.request(method, url, **kwargs) as response:
+                text = await response.text()
+                return AsyncResponse(response.status, response.headers, text, url)
+
+    async def request(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        await self.open()
+        attempt = 0
+        rate_limited = 0
+        timed = metrics.enabled
+        endpoint = endpoint_template(url) if timed else None
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        while True:
+            waited = self.limiter.reserve()
+            await asyncio.sleep(waited)
+            if timed:
+                metrics.slept("limiter", waited)
+                started = time.perf_counter()
+            try:
+                response = await self._send(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if timed:
+                    metrics.observe(method, endpoint, None, time.perf_counter() - started)
+                attempt += 1
+                # ONLY A FAILED CONNECT IS SAFE TO RETRY FOR A POST
+                if attempt > MAX_RETRIES or not (idempotent or isinstance(e, aiohttp.ClientConnectorError)):
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise Timeout(str(e)) from e
+                    raise ConnectionError(str(e)) from e
+                wait = backoff(attempt)
+                if timed:
+                    metrics.retry(method, endpoint, type(e).__name__, wait)
+                print(f"Connection error ({type(e).__name__}). Retry {attempt}/{MAX_RETRIES} in {wait:.1f} seconds...")
+                await asyncio.sleep(wait)
+                continue
+
+            if timed:
+                metrics.observe(method, endpoint, response.status_code, time.perf_counter() - started,
+                                len(response.text.encode("utf-8")))
+            self.limiter.update_from_headers(response.headers)
+
+            if response.status_code == 429 and rate_limited < MAX_RATE_LIMIT_RETRIES:
+                rate_limited += 1
+                wait = _number(response.headers.get("Retry-After"))
+                if wait is None:
+                    wait = backoff(rate_limited)
+                self.limiter.pause(wait)
+                if timed:
+                    metrics.rate_limited(method, endpoint, wait)
+                print(f"Rate limit reached (HTTP 429). Waiting {wait:.0f} seconds...")
+                await asyncio.sleep(wait)
+                continue
+            if response.status_code in RETRY_STATUS and idempotent and attempt < MAX_RETRIES:
+                attempt += 1
+                wait = backoff(attempt)
+                if timed:
+                    metrics.retry(method, endpoint, f"HTTP {response.status_code}", wait)
+                print(f"Server error (HTTP {response.status_code}). Retry {attempt}/{MAX_RETRIES} in {wait:.1f} seconds...")
+                await asyncio.sleep(wait)
+                continue
+            response.raise_for_status()
+            return response
+
+
+class AsyncJiraRoles(AsyncJiraClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._role_cache = {}
+        self._role_loads = {}
+
+    # ------------------------------------------------------------------
+    # CACHE
+    # ------------------------------------------------------------------
+
+    def clear_cache(self, project: Optional[str] = None):
+        if project is None:
+            self._role_cache.clear()
+            self._role_loads.clear()
+        else:
+            self._role_cache.pop(project, None)
+            self._role_loads.pop(project, None)
+
+    # ------------------------------------------------------------------
+    # PRIVATE METHODS
+    # ------------------------------------------------------------------
+
+    async def _load_project_roles(self, project: str):
+        if project in self._role_cache:
+            return
+        # CONCURRENT CALLERS FOR THE SAME PROJECT SHARE ONE GET
+        if project not in self._role_loads:
+            self._role_loads[project] = asyncio.ensure_future(self._fetch_project_roles(project))
+        try:
+            await self._role_loads[project]
+        finally:
+            self._role_loads.pop(project, None)
+
+    async def _fetch_project_roles(self, project: str):
+        try:
+            response = await self.request(
+                "GET",
+                f"{self.base_url}/rest/api/2/project/{project}/role"
+            )
+        except HTTPError as e:
+            response = e.response
+            if response is not None and response.status_code in (401, 403):
+                print(
+                    f"Skipping project '{project}': "
+                    f"No permission to access Jira roles."
+                )
+                self._role_cache[project] = {}
+                return
+            raise
+        roles = {}
+        for role_name, role_url in response.json().items():
+            roles[role_name] = {
+                "id": role_url.rstrip("/").split("/")[-1],
+                "url": role_url,
+            }
+        self._role_cache[project] = roles
+
+    async def _get_role(self, project: str, role_name: str):
+        await self._load_project_roles(project)
+        roles = self._role_cache.get(project, {})
+        if not roles:
+            print(
+                f"Cannot access roles for project '{project}'."
+            )
+            return None
+        if role_name not in roles:
+            raise Exception(
+                f"Role '{role_name}' not found in project '{project}'"
+            )
+        return roles[role_name]
+
+    async def get_role_names(self, project: str) -> List[str]:
+        await self._load_project_roles(project)
+        roles = self._role_cache.get(project)
+        if roles is None:
+            return []
+        return list(roles.keys())
+
+    async def _get_role_data(self, project: str, role_name: str):
+        role = await self._get_role(project, role_name)
+        if role is None:
+            return None
+        response = await self.request("GET", role["url"])
+        return response.json()
+
+    async def _remove_actors(
+            self,
+            project: str,
+            role_name: str,
+            parameter: str,
+            values: List[str]
+    ):
+        if not values:
+            return
+        role = await self._get_role(project, role_name)
+        await asyncio.gather(*(
+            self.request("DELETE", role["url"], params={parameter: value})
+            for value in values
+        ))
+
+    async def get_actors(self, project: str, role_name: str) -> Dict[str, List[str]]:
+        role = await self._get_role_data(project, role_name)
+        return {
+            "users": _actor_names(role, USER_ACTOR),
+            "groups": _actor_names(role, GROUP_ACTOR),
+        }
+
+    # ------------------------------------------------------------------
+    # USERS MANAGEMENT
+    # ------------------------------------------------------------------
+
+    async def get_users(self, project: str, role_name: str) -> List[str]:
+        role = await self._get_role_data(project, role_name)
+        return _actor_names(role, USER_ACTOR)
+
+    async def add_users(self, project: str, role_name: str, users: List[str]):
+        if not users:
+            return
+        role = await self._get_role(project, role_name)
+        response = await self.request("POST", role["url"], json={"user": users})
+        return response.json()
+
+    async def remove_users(self, project: str, role_name: str, users: List[str]):
+        return await self._remove_actors(project, role_name, "user", users)
+
+    # ------------------------------------------------------------------
+    # GROUP MANAGEMENT
+    # ------------------------------------------------------------------
+
+    async def get_groups(self, project: str, role_name: str) -> List[str]:
+        role = await self._get_role_data(project, role_name)
+        return _actor_names(role, GROUP_ACTOR)
+
+    async def add_groups(
+            self,
+            project: str,
+            role_name: str,
+            groups: List[str],
+            current_groups: Optional[List[str]] = None
+    ):
+        if not groups:
+            return
+        if current_groups is None:
+            current_groups = await self.get_groups(project, role_name)
+        groups_to_add = [
+            group
+            for group in groups
+            if group not in current_groups
+        ]
+        if not groups_to_add:
+            return
+        role = await self._get_role(project, role_name)
+        response = await self.request("POST", role["url"], json={"group": groups_to_add})
+        return response.json()
+
+    async def remove_groups(self, project: str, role_name: str, groups: List[str]):
+        return await self._remove_actors(project, role_name, "group", groups)
+
+    # ------------------------------------------------------------------
+    # REMOVE ALL
+    # ------------------------------------------------------------------
+
+    async def clean_project(self, project: str, keep_groups: List[str]):
+        summary = {}
+        print(f"\nCleaning roles for project: {project}")
+        role_names = await self.get_role_names(project)
+        if not role_names:
+            print(
+                f"Skipping role cleanup for '{project}': No Jira role access."
+            )
+            return summary
+
+        # ONE GET PER ROLE - EVERY ADD AND REMOVE BELOW IS COMPUTED FROM THIS SNAPSHOT (SAME AS JiraRoles)
+        snapshot = dict(zip(
+            role_names,
+            await asyncio.gather(*(self.get_actors(project, role_name) for role_name in role_names))
+        ))
+
+        print(f"Adding ICT Governance Brasil to the project: {project}")
+        await asyncio.gather(*(
+            self.add_groups(
+                project=project,
+                role_name=role_name,
+                groups=[GOVERNANCE_GROUP],
+                current_groups=snapshot.get(role_name, {}).get("groups")
+            )
+            for role_name in GOVERNANCE_ROLES
+        ))
+
+        print(f"Removing users and groups from project: {project}")
+        removals = []
+        for role_name in role_names:
+            actors = snapshot[role_name]
+            # THE GOVERNANCE GROUP JUST ADDED IS NEVER REMOVED FROM ITS OWN ROLES
+            keep = set(keep_groups)
+            if role_name in GOVERNANCE_ROLES:
+                keep.add(GOVERNANCE_GROUP)
+            groups_to_remove = [
+                g for g in actors["groups"]
+                if g not in keep
+            ]
+            removals.append(self.remove_users(project, role_name, actors["users"]))
+            removals.append(self.remove_groups(project, role_name, groups_to_remove))
+            summary[role_name] = {
+                "users": actors["users"],
+                "groups": groups_to_remove
+            }
+        await asyncio.gather(*removals)
+        print(f"Finished cleaning roles for project: {project}")
+        return summary
+
+
+class AsyncProfields(AsyncJiraClient):
+
+    # ------------------------------------------------------------------
+    # UPDATE A SINGLE FIELD
+    # ------------------------------------------------------------------
+
+    async def update_onefield(self, project: str, field: ProjectField, value: Any):
+        payload = {
+            "id": int(field),
+            "value": value,
+            "action": {
+                "isVisibleValue": True,
+                "isEditableValue": True
+            }
+        }
+        url = (
+            f"{self.base_url}"
+            f"/rest/profields/api/2.0/values/projects/"
+            f"{project}/fields/{int(field)}"
+        )
+        try:
+            response = await self.request("POST", url, json=payload)
+            return response.json() if response.text else None
+
+        except (ConnectionError, Timeout):
+            print("Network Error: Unable to connect to Jira. Check your company network or VPN connection.")
+            raise SystemExit(1)
+
+    # ------------------------------------------------------------------
+    # READ CURRENT VALUES
+    # ------------------------------------------------------------------
+
+    async def get_values(self, project: str) -> Dict[int, Any]:
+        url = (
+            f"{self.base_url}"
+            f"/rest/profields/api/2.0/values/projects/"
+            f"{project}/fields"
+        )
+        try:
+            response = await self.request("GET", url)
+        except (ConnectionError, Timeout):
+            print("Network Error: Unable to connect to Jira. Check your company network or VPN connection.")
+            raise SystemExit(1)
+        return _parse_values(response.json())
+
+    async def changed_fields(self, project: str, fields: Dict[ProjectField, Any]) -> Optional[Dict[ProjectField, Any]]:
+        # SAME RULES AS Profields.changed_fields - None MEANS "SEND EVERY FIELD", ONLY 401/403 STOP THE PROJECT
+        try:
+            current = await self.get_values(project)
+        except HTTPError as e:
+            response = e.response
+            if response is not None and response.status_code in (401, 403):
+                raise
+            status = response.status_code if response is not None else "no response"
+            print(f"WARNING: could not read current values of project '{project}' ({status}), updating every field.")
+            return None
+        return _changed(current, fields)
+
+    # ------------------------------------------------------------------
+    # UPDATE MULTIPLE FIELDS
+    # ------------------------------------------------------------------
+
+    def _report_error(self, project: str, e: HTTPError) -> bool:
+        response = e.response
+        if response is None:
+            print("HTTPError without response object")
+            print(e)
+            return False
+        status_code = response.status_code
+        if status_code in (400, 401, 403, 405):
+            print(
+                f"API Returned {status_code} - Cannot update project '{project}'."
+            )
+            return False
+        print(
+            f"Unexpected error updating project '{project}'."
+        )
+        print(f"HTTP Status: {status_code}")
+        print(response.text)
+        return False
+
+    async def update_multifields(
+            self,
+            project: str,
+            fields: Dict[ProjectField, Any],
+            skip_unchanged: bool = True,
+            max_concurrency: int = FIELD_WORKERS
+    ) -> bool:
+        if skip_unchanged:
+            try:
+                changed = await self.changed_fields(project, fields)
+            except HTTPError as e:
+                return self._report_error(project, e)
+            if changed is not None:
+                unchanged = len(fields) - len(changed)
+                if unchanged:
+                    print(f"{unchanged} field(s) already up to date in project '{project}'.")
+                fields = changed
+        if not fields:
+            return True
+
+        for field, value in fields.items():
+            print(f"Updating {field.name} -> {value}")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        started = set()
+        failed = []
+
+        async def update(field: ProjectField, value: Any):
+            async with semaphore:
+                # A FAILURE RELEASES ITS SLOT BEFORE asyncio.wait RETURNS - THE NEXT FIELD MUST NOT START
+                if failed:
+                    raise asyncio.CancelledError()
+                started.add(field)
+                try:
+                    return await self.update_onefield(project, field, value)
+                except BaseException:
+                    failed.append(field)
+                    raise
+
+        tasks = {field: asyncio.ensure_future(update(field, value)) for field, value in fields.items()}
+        await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        # THE FIRST FAILURE STOPS THE PROJECT: UPDATES NOT STARTED YET ARE CANCELLED, THOSE IN FLIGHT FINISH
+        for field, task in tasks.items():
+            if field not in started:
+                task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for task in tasks.values():
+            if task.cancelled():
+                continue
+            error = task.exception()
+            if error is None:
+                continue
+            if isinstance(error, HTTPError):
+                return self._report_error(project, error)
+            raise error
+        return True
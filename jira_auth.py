@@ -1,38 +1,289 @@
 import os
 import time
+import random
+import hashlib
+import threading
 import requests
+from typing import Optional
+from functools import lru_cache
+from atlassian import Jira
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout, SSLError
 from dotenv import load_dotenv
+from jira_metrics import metrics, endpoint_template
+from jira_cache import HttpCache
 
 load_dotenv()
 
 BASE_URL = os.getenv("JIRA_URL")
-session = requests.Session()
 
-session.headers.update({
-    "Authorization": f"Bearer {os.getenv('JIRA_TOKEN')}",
-    "Content-Type": "application/json",
-    "Accept": "application/json"
-})
+# CONNECTION POOL - KEEP-ALIVE CONNECTIONS KEPT PER HOST, SIZED FOR THE THREAD POOLS USING IT #
+POOL_SIZE = 32
+DEFAULT_TIMEOUT = 75
+
+# RETRIES - 5XX AND CONNECTION FAILURES USE EXPONENTIAL BACKOFF WITH JITTER #
+MAX_RETRIES = 5
+MAX_RATE_LIMIT_RETRIES = 10
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUS = (500, 502, 503, 504)
+# A POST THAT TIMED OUT OR GOT A 5XX MAY ALREADY BE APPLIED (TRANSITION, COMMENT, ROLE ACTOR) - ONLY THESE ARE RETRIED #
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# METADATA RESPONSES KEPT ON DISK AND REVALIDATED WITH If-None-Match / If-Modified-Since (EMPTY DIR = OFF) #
+HTTP_CACHE_DIR = os.getenv("JIRA_HTTP_CACHE_DIR", ".jira_http_cache")
+# ENDPOINT TEMPLATE: SECONDS SERVED FROM DISK WITHOUT ASKING JIRA - AFTER THAT, ONE CONDITIONAL REQUEST #
+HTTP_CACHE_TTLS = {
+    "/rest/api/2/project": 6 * 60 * 60,
+    "/rest/api/2/field": 24 * 60 * 60,
+    "/rest/api/2/project/{key}/role": 60 * 60,
+}
+
+
+class RateLimiter:
+
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None):
+        # rate None: NO CLIENT-SIDE CAP UNTIL THE SERVER SENDS X-RateLimit-* HEADERS; A 429 STILL PAUSES EVERYONE
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity or 0.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # TOKENS
+    # ------------------------------------------------------------------
+
+    def reserve(self) -> float:
+        # TAKES ONE TOKEN (POSSIBLY IN ADVANCE) AND RETURNS HOW LONG THE CALLER MUST WAIT FOR IT
+        with self._lock:
+            now = time.monotonic()
+            if not self.rate:
+                self.updated = now
+                return max(0.0, self.paused_until - now)
+            self.tokens = min(self.capacity or self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        # A 429 STOPS EVERY CLIENT SHARING THIS LIMITER, NOT ONLY THE ONE THAT RECEIVED IT
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    # ------------------------------------------------------------------
+    # LEARNING FROM THE SERVER
+    # ------------------------------------------------------------------
+
+    def update_from_headers(self, headers):
+        # JIRA DATA CENTER: X-RateLimit-Limit / -FillRate / -Interval-Seconds / -Remaining
+        limit = _number(headers.get("X-RateLimit-Limit"))
+        fill_rate = _number(headers.get("X-RateLimit-FillRate"))
+        interval = _number(headers.get("X-RateLimit-Interval-Seconds")) or 1.0
+        remaining = _number(headers.get("X-RateLimit-Remaining"))
+        if limit is None and fill_rate is None and remaining is None:
+            return
+        with self._lock:
+            if limit:
+                self.capacity = limit
+            if fill_rate:
+                if not self.rate:
+                    # FIRST HEADERS SEEN - START FROM A FULL BUCKET, CLAMPED BY Remaining BELOW
+                    self.tokens = self.capacity or fill_rate / interval
+                self.rate = fill_rate / interval
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt: int) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _response_size(response) -> int:
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    return len(response.content)
+
+
+def request_with_retries(send, limiter, method: str, url: str, **kwargs) -> requests.Response:
+    attempt = 0
+    rate_limited = 0
+    # METRICS OFF: ONE FLAG CHECK PER REQUEST, NO TIMING AND NO URL PARSING
+    timed = metrics.enabled
+    endpoint = endpoint_template(url) if timed else None
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    while True:
+        waited = limiter.acquire()
+        if timed:
+            metrics.slept("limiter", waited)
+            started = time.perf_counter()
+        try:
+            response = send(method, url, **kwargs)
+        except SSLError:
+            raise
+        except (ConnectionError, Timeout) as e:
+            if timed:
+                metrics.observe(method, endpoint, None, time.perf_counter() - started)
+            attempt += 1
+            # A CONNECT TIMEOUT NEVER REACHED THE SERVER, SO IT IS SAFE TO RETRY FOR ANY METHOD
+            if attempt > MAX_RETRIES or not (idempotent or isinstance(e, ConnectTimeout)):
+                raise
+            wait = backoff(attempt)
+            if timed:
+                metrics.retry(method, endpoint, type(e).__name__, wait)
+            print(f"Connection error ({type(e).__name__}). Retry {attempt}/{MAX_RETRIES} in {wait:.1f} seconds...")
+            time.sleep(wait)
+            continue
+
+        if timed:
+            metrics.observe(method, endpoint, response.status_code, time.perf_counter() - started,
+                            _response_size(response))
+        limiter.update_from_headers(response.headers)
+
+        if response.status_code == 429 and rate_limited < MAX_RATE_LIMIT_RETRIES:
+            rate_limited += 1
+            wait = _number(response.headers.get("Retry-After"))
+            if wait is None:
+                wait = backoff(rate_limited)
+            limiter.pause(wait)
+            if timed:
+                metrics.rate_limited(method, endpoint, wait)
+            print(f"Rate limit reached (HTTP 429). Waiting {wait:.0f} seconds...")
+            time.sleep(wait)
+            continue
+        if response.status_code in RETRY_STATUS and idempotent and attempt < MAX_RETRIES:
+            attempt += 1
+            wait = backoff(attempt)
+            if timed:
+                metrics.retry(method, endpoint, f"HTTP {response.status_code}", wait)
+            print(f"Server error (HTTP {response.status_code}). Retry {attempt}/{MAX_RETRIES} in {wait:.1f} seconds...")
+            time.sleep(wait)
+            continue
+        return response
+
+
+# SHARED BY EVERY CLIENT (JiraRoles, Profields, atlassian Jira...) SO THE TOTAL RATE IS WHAT COUNTS #
+rate_limiter = RateLimiter()
+
+
+def _cached_response(entry, url: str, cache_status: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = entry["body"].encode("utf-8")
+    response.headers["Content-Type"] = entry.get("content_type") or "application/json"
+    response.headers["X-Cache"] = cache_status
+    for header, name in (("ETag", "etag"), ("Last-Modified", "last_modified")):
+        if entry.get(name):
+            response.headers[header] = entry[name]
+    return response
+
+
+class JiraSession(requests.Session):
+
+    def __init__(self, limiter: RateLimiter = None, http_cache: HttpCache = None):
+        super().__init__()
+        self.limiter = limiter or rate_limiter
+        self.http_cache = http_cache
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        # EVERY CALL - atlassian Jira, JiraClient OR session.get/post - GOES THROUGH THE LIMITER AND RETRIES
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        if self.http_cache is not None and method.upper() == "GET" and not kwargs.get("data") \
+                and not kwargs.get("json") and not kwargs.get("stream"):
+            ttl = self.http_cache.ttl_for(endpoint_template(url))
+            if ttl is not None:
+                return self._cached_get(url, ttl, **kwargs)
+        return request_with_retries(super().request, self.limiter, method, url, **kwargs)
+
+    def _cached_get(self, url: str, ttl: float, **kwargs) -> requests.Response:
+        full_url = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        # THE TOKEN IS PART OF THE KEY - ANOTHER USER MAY SEE OTHER PROJECTS
+        token = hashlib.sha1(str(self.headers.get("Authorization")).encode("utf-8")).hexdigest()[:12]
+        key = f"{token} {full_url}"
+        entry = self.http_cache.load(key)
+        if entry is not None and self.http_cache.is_fresh(entry, ttl):
+            return _cached_response(entry, full_url, "HIT")
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = request_with_retries(super().request, self.limiter, "GET", url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.http_cache.touch(entry)
+            return _cached_response(entry, full_url, "REVALIDATED")
+        if response.status_code == 200:
+            try:
+                body = response.content.decode("utf-8")
+            except UnicodeDecodeError:
+                return response
+            self.http_cache.store(key, body, response.headers)
+        return response
+
+
+def build_session(
+        token: str = None,
+        pool_size: int = POOL_SIZE,
+        limiter: RateLimiter = None,
+        http_cache: HttpCache = None
+) -> JiraSession:
+    jira_session = JiraSession(limiter, http_cache)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    jira_session.mount("https://", adapter)
+    jira_session.mount("http://", adapter)
+    jira_session.headers.update({
+        "Authorization": f"Bearer {token or os.getenv('JIRA_TOKEN')}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate"
+    })
+    return jira_session
+
+
+# ONE POOLED TRANSPORT FOR THE WHOLE PROCESS #
+http_cache = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_TTLS) if HTTP_CACHE_DIR else None
+session = build_session(http_cache=http_cache)
+
+
+@lru_cache(maxsize=None)
+def get_jira() -> Jira:
+    # atlassian Jira ON TOP OF THE SHARED SESSION - SAME POOL, LIMITER AND RETRIES AS JiraClient
+    return Jira(url=BASE_URL, session=session)
 
 
 class JiraClient:
 
-    def __init__(self, session: requests.Session, base_url: str):
+    def __init__(self, session: requests.Session, base_url: str, limiter: RateLimiter = None):
         self.session = session
         self.base_url = base_url.rstrip("/")
+        self.limiter = limiter or rate_limiter
 
     def request(self, method: str, url: str, **kwargs) -> requests.Response:
-        while True:
+        if isinstance(self.session, JiraSession):
             response = self.session.request(method, url, **kwargs)
-
-            if response.status_code == 429:
-                retry_after = response.headers.get("Retry-After")
-                try:
-                    wait = int(retry_after)
-                except (TypeError, ValueError):
-                    wait = 60
-                print(f"Rate limit reached (HTTP 429). Waiting {wait} seconds...")
-                time.sleep(wait)
-                continue
-            response.raise_for_status()
-            return response
+        else:
+            response = request_with_retries(self.session.request, self.limiter, method, url, **kwargs)
+        response.raise_for_status()
+        return response
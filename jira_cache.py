@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# DEFAULTS - ENTRIES EXPIRE AFTER ttl SECONDS, THE LEAST RECENTLY USED ONES ARE DROPPED AFTER maxsize #
+CACHE_SIZE = 4096
+CACHE_TTL = 6 * 60 * 60
+
+_MISSING = object()
+
+
+class TTLCache:
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        # KEY: (EXPIRES AT - WALL CLOCK SO IT STILL MEANS SOMETHING AFTER A RELOAD FROM DISK, VALUE)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # ------------------------------------------------------------------
+    # PERSISTENCE
+    # ------------------------------------------------------------------
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            # A CORRUPT OR PARTIAL FILE IS JUST A COLD CACHE
+            return
+        now = time.time()
+        with self._lock:
+            for key, expires, value in entries:
+                if expires >= now:
+                    self._data[key] = (expires, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [[key, expires, value] for key, (expires, value) in self._data.items() if expires >= now]
+        # WRITE TO A TEMPORARY FILE FIRST SO AN INTERRUPTED SAVE NEVER LEAVES HALF A CACHE BEHIND
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+# ------------------------------------------------------------------
+# HTTP RESPONSES - ONE FILE PER URL WITH ITS ETag / Last-Modified
+# ------------------------------------------------------------------
+
+class HttpCache:
+
+    def __init__(self, directory: str, ttls: Dict[str, float]):
+        self.directory = directory
+        # ENDPOINT TEMPLATE: SECONDS SERVED WITHOUT ASKING JIRA (0 = ALWAYS REVALIDATE); OTHER ENDPOINTS ARE NOT CACHED
+        self.ttls = dict(ttls)
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        return self.ttls.get(endpoint)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("key") == key else None
+
+    def store(self, key: str, body: str, headers, stored_at: Optional[float] = None) -> Dict[str, Any]:
+        entry = {
+            "key": key,
+            "stored_at": time.time() if stored_at is None else stored_at,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+            "body": body,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return entry
+
+    def touch(self, entry: Dict[str, Any]):
+        # 304 - SAME BODY, THE TTL STARTS AGAIN
+        headers = {"ETag": entry.get("etag"), "Last-Modified": entry.get("last_modified"),
+                   "Content-Type": entry.get("content_type")}
+        self.store(entry["key"], entry["body"], headers)
+
+    def is_fresh(self, entry: Dict[str, Any], ttl: float) -> bool:
+        return time.time() - entry["stored_at"] < ttl
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,128 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from jira_auth import get_jira
+
+# SEPARATES THE NAMES IN THE JOINED INDEX - CAN'T APPEAR IN A NORMALIZED NAME OR SEARCH TERM #
+_SEPARATOR = "\x00"
+_PROJECT_KEY = re.compile(r"^[A-Z][A-Z0-9_]+$")
+
+
+def normalize(text: str) -> str:
+    # SAME MATCHING AS THE OLD find_projects: term.lower() in name.lower()
+    return str(text).lower().replace(_SEPARATOR, " ")
+
+
+class ProjectCatalog:
+
+    def __init__(self, projects: Iterable[dict]):
+        self.projects: List[dict] = [
+            {"key": project["key"], "name": project.get("name", "")}
+            for project in projects
+        ]
+        names = [normalize(project["name"]) for project in self.projects]
+        self._by_key: Dict[str, int] = {project["key"].upper(): i for i, project in enumerate(self.projects)}
+        self._by_name: Dict[str, List[int]] = {}
+        for i, name in enumerate(names):
+            self._by_name.setdefault(name, []).append(i)
+
+        # SUBSTRING: ONE JOINED STRING SEARCHED WITH str.find, THE OFFSET IS MAPPED BACK TO THE PROJECT WITH bisect
+        self._joined = _SEPARATOR.join(names)
+        self._starts: List[int] = []
+        offset = 0
+        for name in names:
+            self._starts.append(offset)
+            offset += len(name) + 1
+
+        # PREFIX: NAMES AND KEYS SORTED ONCE, EACH LOOKUP IS A bisect RANGE
+        self._sorted_names: List[Tuple[str, int]] = sorted((name, i) for i, name in enumerate(names))
+        self._sorted_keys: List[Tuple[str, int]] = sorted(
+            (project["key"].lower(), i) for i, project in enumerate(self.projects)
+        )
+
+    def __len__(self):
+        return len(self.projects)
+
+    @classmethod
+    def from_jira(cls, jira=None) -> "ProjectCatalog":
+        # THE PROJECT LIST GOES THROUGH THE SESSION HTTP CACHE (jira_auth.HTTP_CACHE_TTLS)
+        return cls((jira or get_jira()).projects())
+
+    # ------------------------------------------------------------------
+    # LOOKUPS - RESULTS KEEP THE ORDER JIRA RETURNED THE PROJECTS IN
+    # ------------------------------------------------------------------
+
+    def _contains(self, term: str) -> List[int]:
+        term = normalize(term)
+        if not term:
+            return []
+        matches = set()
+        position = self._joined.find(term)
+        while position >= 0:
+            index = bisect_right(self._starts, position) - 1
+            matches.add(index)
+            # THE NEXT MATCH CAN ONLY BE IN A LATER NAME
+            next_start = self._starts[index + 1] if index + 1 < len(self._starts) else len(self._joined)
+            position = self._joined.find(term, next_start)
+        return sorted(matches)
+
+    @staticmethod
+    def _prefix(sorted_items: List[Tuple[str, int]], prefix: str) -> List[int]:
+        start = bisect_left(sorted_items, (prefix,))
+        end = bisect_left(sorted_items, (prefix + "\U0010ffff",))
+        return sorted(index for _, index in sorted_items[start:end])
+
+    def search(self, terms: Iterable[str]) -> List[str]:
+        # KEYS OF THE PROJECTS WHOSE NAME CONTAINS ANY OF THE TERMS
+        matches = set()
+        for term in terms:
+            matches.update(self._contains(term))
+        return [self.projects[i]["key"] for i in sorted(matches)]
+
+    def name_prefix(self, prefix: str) -> List[str]:
+        return [self.projects[i]["key"] for i in self._prefix(self._sorted_names, normalize(prefix))]
+
+    def key_prefix(self, prefix: str) -> List[str]:
+        return [self.projects[i]["key"] for i in self._prefix(self._sorted_keys, prefix.lower())]
+
+    def get(self, key: str) -> Optional[dict]:
+        index = self._by_key.get(key.upper())
+        return self.projects[index] if index is not None else None
+
+    def resolve(self, value: str) -> Optional[str]:
+        # KEY, EXACT NAME, THEN A UNIQUE NAME PREFIX OR SUBSTRING - AMBIGUOUS OR UNKNOWN VALUES GIVE None
+        if value.upper() in self._by_key:
+            return self.projects[self._by_key[value.upper()]]["key"]
+        exact = self._by_name.get(normalize(value), [])
+        if not exact and _PROJECT_KEY.match(value):
+            # ARCHIVED, NOT LISTED OR NEWER THAN THE CACHED LIST - A KEY IS PASSED THROUGH AS BEFORE
+            return value
+        for candidates in (
+                exact,
+                self._prefix(self._sorted_names, normalize(value)),
+                self._contains(value),
+        ):
+            if len(candidates) == 1:
+                return self.projects[candidates[0]]["key"]
+            if len(candidates) > 1:
+                print(f"Project '{value}' is ambiguous: {[self.projects[i]['key'] for i in candidates[:10]]}")
+                return None
+        print(f"Project '{value}' not found.")
+        return None
+
+    def resolve_all(self, values: Iterable[str]) -> Tuple[List[str], List[str]]:
+        keys, missing = [], []
+        for value in values:
+            key = self.resolve(value)
+            if key is None:
+                missing.append(value)
+            elif key not in keys:
+                keys.append(key)
+        return keys, missing
+
+
+@lru_cache(maxsize=None)
+def get_catalog() -> ProjectCatalog:
+    # ONE CATALOG PER PROCESS, SHARED BY issue_extraction, jira_roles AND jira_projectcloser
+    return ProjectCatalog.from_jira()
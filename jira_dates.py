@@ -0,0 +1,45 @@
+from datetime import datetime, time
+from functools import lru_cache
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+DATE_FORMAT = "%Y-%m-%d"
+TIME_FORMAT = "%H:%M"
+
+# DISTINCT STRINGS KEPT PER PARSER - RELEASE DATES AND THE 1999-01-01 FALLBACK REPEAT A LOT #
+CACHE_SIZE = 4096
+
+
+# ------------------------------------------------------------------
+# PARSERS
+# ------------------------------------------------------------------
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_timestamp(value: str) -> datetime:
+    # fromisoformat IS IMPLEMENTED IN C; strptime STAYS AS THE REFERENCE FOR ANYTHING IT REJECTS
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        return datetime.strptime(value, TIMESTAMP_FORMAT).replace(tzinfo=None)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(value: str) -> datetime:
+    try:
+        return datetime.combine(datetime.fromisoformat(value).date(), time())
+    except ValueError:
+        return datetime.strptime(value, DATE_FORMAT)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(value: str) -> str:
+    return parse_date(value).strftime("%d/%m/%Y")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_time(value: str) -> str:
+    return datetime.strptime(value, TIME_FORMAT).strftime(TIME_FORMAT)
+
+
+def clear_caches():
+    for parser in (parse_timestamp, parse_date, format_date, format_time):
+        parser.cache_clear()
@@ -0,0 +1,253 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+from jira_dates import parse_timestamp, format_date, format_time
+
+NULL_TIMESTAMP = "1999-01-01T00:00:00.000+0000"
+NULL_DATE = "1999-01-01"
+NULL_TIME = "00:00"
+
+
+class FieldSpec(NamedTuple):
+    column: str
+    kind: str
+    source: Union[str, Tuple[str, ...], None] = None
+    default: Any = "N/A"
+    arg: Any = None
+    upper: bool = False
+    replace: Tuple[Tuple[str, str], ...] = ()
+
+
+Accessor = Callable[[dict, dict], Any]
+
+
+# ------------------------------------------------------------------
+# EXTRACTORS
+# ------------------------------------------------------------------
+
+def _key(spec: FieldSpec) -> Accessor:
+    default = spec.default
+    return lambda issue, fields: issue.get("key", default)
+
+
+def _raw(spec: FieldSpec) -> Accessor:
+    source, default = spec.source, spec.default
+    return lambda issue, fields: fields.get(source, default)
+
+
+def _or(spec: FieldSpec) -> Accessor:
+    source, default = spec.source, spec.default
+    return lambda issue, fields: fields.get(source) or default
+
+
+def _path(spec: FieldSpec) -> Accessor:
+    source, path, default = spec.source, tuple(spec.arg), spec.default
+
+    def accessor(issue, fields):
+        value = fields.get(source)
+        for step in path:
+            if isinstance(step, int):
+                if not isinstance(value, list) or len(value) <= step:
+                    return default
+            elif not isinstance(value, dict):
+                return default
+            elif step not in value:
+                return default
+            value = value[step]
+        return value
+    return accessor
+
+
+def _option(spec: FieldSpec) -> Accessor:
+    source, default = spec.source, spec.default
+
+    def accessor(issue, fields):
+        value = fields.get(source)
+        if not value:
+            return default
+        if isinstance(value, dict):
+            return value.get("value", default)
+        return str(value)
+    return accessor
+
+
+def _users(spec: FieldSpec) -> Accessor:
+    source, default = spec.source, spec.default
+
+    def accessor(issue, fields):
+        value = fields.get(source)
+        if not value:
+            return default
+        if isinstance(value, list):
+            return ", ".join([user.get("displayName", "N/A") for user in value])
+        if isinstance(value, dict):
+            return value.get("displayName", "N/A")
+        return str(value)
+    return accessor
+
+
+def _join(spec: FieldSpec) -> Accessor:
+    source, attr, default = spec.source, spec.arg, spec.default
+
+    def accessor(issue, fields):
+        value = fields.get(source)
+        if not value:
+            return default
+        if attr is not None:
+            return ", ".join([item[attr] for item in value])
+        return ", ".join(value) if isinstance(value, list) else value
+    return accessor
+
+
+def _concat(spec: FieldSpec) -> Accessor:
+    sources, separator, default = tuple(spec.source), spec.arg or " - ", spec.default
+
+    def accessor(issue, fields):
+        parts = []
+        for source in sources:
+            value = fields.get(source)
+            if isinstance(value, list):
+                value = ", ".join(value)
+            if value:
+                parts.append(value)
+        return separator.join(parts) if parts else default
+    return accessor
+
+
+def _mapped_name(spec: FieldSpec) -> Accessor:
+    source, mapping, default = spec.source, spec.arg, spec.default
+
+    def accessor(issue, fields):
+        value = fields.get(source)
+        name = value.get("name", "N/A") if isinstance(value, dict) else "N/A"
+        return mapping.get(name.upper().strip(), default)
+    return accessor
+
+
+def _datetime(spec: FieldSpec) -> Accessor:
+    source = spec.source
+    return lambda issue, fields: parse_timestamp(fields.get(source) or NULL_TIMESTAMP)
+
+
+def _date_str(spec: FieldSpec) -> Accessor:
+    source = spec.source
+    return lambda issue, fields: format_date(fields.get(source) or NULL_DATE)
+
+
+def _time_str(spec: FieldSpec) -> Accessor:
+    source = spec.source
+    return lambda issue, fields: format_time(fields.get(source) or NULL_TIME)
+
+
+EXTRACTORS: Dict[str, Callable[[FieldSpec], Accessor]] = {
+    "key": _key,
+    "raw": _raw,
+    "or": _or,
+    "path": _path,
+    "option": _option,
+    "users": _users,
+    "join": _join,
+    "concat": _concat,
+    "mapped_name": _mapped_name,
+    "datetime": _datetime,
+    "date_str": _date_str,
+    "time_str": _time_str,
+}
+
+
+# ------------------------------------------------------------------
+# COMPILER
+# ------------------------------------------------------------------
+
+def _build_accessor(spec: FieldSpec) -> Accessor:
+    if spec.kind not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor kind '{spec.kind}' for column '{spec.column}'")
+    accessor = EXTRACTORS[spec.kind](spec)
+    if not spec.upper and not spec.replace:
+        return accessor
+    upper, replace = spec.upper, spec.replace
+
+    def post_processed(issue, fields):
+        value = accessor(issue, fields)
+        if isinstance(value, str):
+            for old, new in replace:
+                value = value.replace(old, new)
+            if upper:
+                value = value.upper()
+        return value
+    return post_processed
+
+
+def compile_field_map(field_map: Iterable[FieldSpec]) -> Callable[[dict], Dict[str, Any]]:
+    accessors = tuple((spec.column, _build_accessor(spec)) for spec in field_map)
+
+    def normalize(issue: dict) -> Dict[str, Any]:
+        fields = issue.get("fields") or {}
+        return {column: accessor(issue, fields) for column, accessor in accessors}
+    return normalize
+
+
+def required_fields(field_map: Iterable[FieldSpec]) -> List[str]:
+    field_ids = []
+    for spec in field_map:
+        if spec.source is None:
+            continue
+        sources = spec.source if isinstance(spec.source, tuple) else (spec.source,)
+        field_ids.extend(sources)
+    return list(dict.fromkeys(field_ids))
+
+
+# ------------------------------------------------------------------
+# PARALLEL NORMALIZATION
+# ------------------------------------------------------------------
+
+_worker_normalize = None
+
+
+def _init_worker(field_map: Tuple[FieldSpec, ...]):
+    global _worker_normalize
+    _worker_normalize = compile_field_map(field_map)
+
+
+def _normalize_chunk(chunk: List[dict]) -> List[Dict[str, Any]]:
+    return [_worker_normalize(issue) for issue in chunk]
+
+
+def _drain(buffer: deque) -> Iterator[List[dict]]:
+    while buffer:
+        yield buffer.popleft()
+
+
+def normalize_parallel(
+        chunks: Iterable[List[dict]],
+        field_map: Tuple[FieldSpec, ...],
+        max_workers: int,
+        min_issues: int = 5000
+) -> Iterator[Dict[str, Any]]:
+    chunks = iter(chunks)
+
+    # SMALL RUNS STAY SERIAL - BUFFER UNTIL min_issues TO KNOW IF THE POOL IS WORTH STARTING
+    buffered, buffered_issues = deque(), 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        buffered_issues += len(chunk)
+        if buffered_issues >= min_issues:
+            break
+    if max_workers <= 1 or buffered_issues < min_issues:
+        normalize = compile_field_map(field_map)
+        for chunk in chain(_drain(buffered), chunks):
+            for issue in chunk:
+                yield normalize(issue)
+        return
+
+    # RESULTS ARE YIELDED IN SUBMISSION ORDER, WITH AT MOST max_workers * 2 CHUNKS IN FLIGHT
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(tuple(field_map),)) as executor:
+        pending = deque()
+        for chunk in chain(_drain(buffered), chunks):
+            pending.append(executor.submit(_normalize_chunk, chunk))
+            if len(pending) >= max_workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
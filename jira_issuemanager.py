@@ -1,7 +1,11 @@
-import os
+import csv
 import logging
-from atlassian import Jira
-from requests.exceptions import HTTPError
+import threading
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from jira_auth import get_jira, backoff
+from jira_journal import Journal, run_id
+from requests.exceptions import HTTPError, ConnectionError, Timeout
 from dotenv import load_dotenv
 import builtins
 
@@ -13,16 +17,8 @@ load_dotenv()
 # LOGGING #
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# JIRA API #
-JIRA_URL = os.getenv('JIRA_URL')
-JIRA_USERNAME = os.getenv('JIRA_USERNAME')
-JIRA_TOKEN = os.getenv('JIRA_TOKEN')
-
-jira_api = Jira(
-    url=JIRA_URL,
-    username=JIRA_USERNAME,
-    token=JIRA_TOKEN
-)
+# JIRA API - SHARED POOLED TRANSPORT FROM jira_auth.py #
+jira_api = get_jira()
 logging.info("JIRA API Configurada e Autenticada.")
 
 # LABELS - THIS IS A LIST #
@@ -32,33 +28,123 @@ which_status_id = 171
 # JIRA ISSUES KEYS #
 issue_keys = ["XXXXXX-111", "XXXXXX-123"]
 
+# BULK LABELS - ONLY ISSUES MISSING A LABEL ARE SEARCHED, EACH ONE GETS A SINGLE ADDITIVE UPDATE #
+bulk_labels = True
+label_workers = 8
+keys_per_query = 500
+label_report_file = 'label_report.csv'
+
+# BULK TRANSITIONS - WORKERS SHARE THE SESSION RATE LIMITER, FAILED ISSUES ARE RETRIED WITH BACKOFF #
+transition_fields = {
+    "customfield_33201": "Expired."
+    #                    "resolution": {
+    #                        "id": "10901"
+    #                    }
+}
+transition_workers = 8
+transition_attempts = 3
+transition_report_file = 'transition_report.csv'
+# FINISHED TRANSITIONS ARE JOURNALED HERE - AN INTERRUPTED RUN WITH THE SAME INPUTS SKIPS THEM ON RESTART #
+journal_file = 'issuemanager.journal'
+# 409 IS A CONCURRENT EDIT, WORTH ANOTHER TRY - 400 IS A VALIDATION ERROR, 429 AND 5XX ARE RETRIED BY THE SESSION #
+RETRYABLE_STATUS = (409,)
+
 # SERACHING ISSUES
 jql_query = 'key in ({})'.format(','.join(f'"{k}"' for k in issue_keys))
 logging.info(f"Procurando pela Query: {jql_query}")
 
 
+# TRANSITION METADATA CACHE
+def workflow_context(issue):
+    # ISSUES IN THE SAME PROJECT, ISSUE TYPE AND STATUS ARE ON THE SAME WORKFLOW STEP AND SHARE THEIR TRANSITIONS
+    fields = issue.get('fields') or {}
+    return (
+        (fields.get('project') or {}).get('key'),
+        (fields.get('issuetype') or {}).get('id'),
+        (fields.get('status') or {}).get('id'),
+    )
+
+
+class TransitionCache:
+
+    def __init__(self):
+        # CONTEXT: {TRANSITION ID: TARGET STATUS NAME}
+        self._transitions = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def transitions(self, jira, issue_key, context):
+        if context is None or None in context:
+            return self._fetch(jira, issue_key)
+        with self._lock:
+            if context in self._transitions:
+                return self._transitions[context]
+            loading = self._loading.setdefault(context, threading.Lock())
+        # CONCURRENT ISSUES OF THE SAME CONTEXT WAIT FOR ONE GET INSTEAD OF SENDING THEIR OWN
+        with loading:
+            with self._lock:
+                if context in self._transitions:
+                    return self._transitions[context]
+            transitions = self._fetch(jira, issue_key)
+            with self._lock:
+                self._transitions[context] = transitions
+                self._loading.pop(context, None)
+            return transitions
+
+    @staticmethod
+    def _fetch(jira, issue_key):
+        return {int(t['id']): t.get('to') for t in jira.get_issue_transitions(issue_key)}
+
+    def target_status(self, transition_id):
+        # NAME OF THE STATUS THE TRANSITION LEADS TO, FROM ANY CONTEXT WHERE IT WAS AVAILABLE
+        with self._lock:
+            for transitions in self._transitions.values():
+                if transition_id in transitions:
+                    return transitions[transition_id]
+        return None
+
+    def invalidate(self, context):
+        with self._lock:
+            self._transitions.pop(context, None)
+
+    def clear(self):
+        with self._lock:
+            self._transitions.clear()
+
+
+transition_cache = TransitionCache()
+
+
 # JIRA TRANSITION
-def transition_issue_by_id(jira, issue_key, transition_id, fields=None):
+def post_transition(jira, issue_key, transition_id, fields=None):
+    base_url = jira.url.rstrip("/")
+    url = f"{base_url}/rest/api/2/issue/{issue_key}/transitions"
+    payload = {
+        "transition": {
+            "id": str(transition_id)
+        }
+    }
+    if fields:
+        payload["fields"] = fields
+    return jira._session.post(url, json=payload)
+
+
+def transition_issue_by_id(jira, issue_key, transition_id, fields=None, context=None, cache=None):
     try:
-        transitions = jira.get_issue_transitions(issue_key)
-        available_ids = {int(t['id']) for t in transitions}
+        if cache is not None:
+            available_ids = cache.transitions(jira, issue_key, context)
+        else:
+            available_ids = TransitionCache._fetch(jira, issue_key)
         if int(transition_id) not in available_ids:
             logging.info(
                 f"Issue {issue_key} already on status or the transition code ID={transition_id} not available."
             )
             return False
 
-        base_url = jira.url.rstrip("/")
-        url = f"{base_url}/rest/api/2/issue/{issue_key}/transitions"
-        payload = {
-            "transition": {
-                "id": str(transition_id)
-            }
-        }
-        if fields:
-            payload["fields"] = fields
-
-        response = jira._session.post(url, json=payload)
+        response = post_transition(jira, issue_key, transition_id, fields)
+        if response.status_code == 400 and cache is not None:
+            # THE CACHED TRANSITIONS MAY BE STALE (WORKFLOW CHANGED) - THE NEXT ISSUE OF THIS CONTEXT RELOADS THEM
+            cache.invalidate(context)
         response.raise_for_status()
 
         logging.info(f"Issue {issue_key} transitioned using ID={transition_id}")
@@ -77,75 +163,275 @@ def transition_issue_by_id(jira, issue_key, transition_id, fields=None):
 
 
 # SEARCH ALL ISSUES AND QUERY LIMITS
-all_issues = []
-start_at = 0
 max_results = 100
+# ONLY THE FIELDS THIS SCRIPT READS ARE DOWNLOADED - project, issuetype AND status KEY THE TRANSITION CACHE #
+issue_fields = ['labels', 'project', 'issuetype', 'status']
 
-while True:
-    page = jira_api.jql(jql_query, start=start_at, limit=max_results)
-    issues_page = page.get('issues', [])
-
-    if not issues_page:
-        break
-
-    all_issues.extend(issues_page)
-    start_at += max_results
-
-    if len(issues_page) < max_results:
-        break
-
-logging.info(f"Total de Issues carregados: {len(all_issues)}")
-
-# UPDATING LABELS
-if not all_issues:
-    logging.info("Nenhum Issue encontrado.")
-else:
-    for issue in all_issues:
-        issue_key = issue['key']
-
-        try:
-            existing_labels = issue['fields'].get('labels', [])
-            existing_labels = [str(lbl) for lbl in existing_labels]
-            labels_to_add = [
-                lbl for lbl in new_label_here
-                if lbl not in existing_labels
-            ]
-            if labels_to_add:
-                updated_labels = existing_labels + labels_to_add
-                jira_api.update_issue_field(
-                    issue_key,
-                    fields={"labels": updated_labels}
-                )
-                logging.info(f"Labels add to the issue {issue_key}: {labels_to_add}")
-            else:
-                logging.info(f"Issue {issue_key} already has the requested labels.")
-        except HTTPError as err:
-            logging.error(
-                f"Issue {issue_key} | HTTP  Error updating labels: "
-                f"{err.response.status_code} - {err.response.text}"
-            )
-        except Exception as e:
-            logging.error(
-                f"Issue {issue_key} | Unexpected Error updating labels: {e}"
+
+def search_issues(jql, fields, validate_query=None):
+    issues = []
+    start_at = 0
+    while True:
+        page = jira_api.jql(jql, fields=fields, start=start_at, limit=max_results, validate_query=validate_query)
+        issues_page = page.get('issues', [])
+
+        if not issues_page:
+            break
+
+        issues.extend(issues_page)
+        start_at += max_results
+
+        if len(issues_page) < max_results:
+            break
+    return issues
+
+
+def write_report(filename, rows, fieldnames=('issue', 'result', 'detail')):
+    with open(filename, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(fieldnames))
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Report saved to: '{filename}'")
+
+
+# BULK LABELS
+def keys_jql(keys):
+    return 'key in ({})'.format(','.join(f'"{k}"' for k in keys))
+
+
+def missing_labels_jql(keys, labels):
+    # JQL "labels != X" SKIPS ISSUES WITHOUT LABELS, SO EMPTY IS CHECKED EXPLICITLY
+    missing = ' OR '.join(f'labels != "{label}"' for label in labels)
+    return f'{keys_jql(keys)} AND (labels is EMPTY OR {missing})'
+
+
+def add_labels(jira, issue_key, labels):
+    # ADDITIVE UPDATE - NO READ-MODIFY-WRITE, EXISTING LABELS ARE KEPT AND DUPLICATES IGNORED BY JIRA
+    payload = {"update": {"labels": [{"add": label} for label in labels]}}
+    try:
+        jira.put(f"rest/api/2/issue/{issue_key}", data=payload)
+        logging.info(f"Labels add to the issue {issue_key}: {labels}")
+        return {'issue': issue_key, 'result': 'labeled', 'detail': ', '.join(labels)}
+    except HTTPError as err:
+        detail = f"{err.response.status_code} - {err.response.text}" if err.response is not None else str(err)
+        logging.error(f"Issue {issue_key} | HTTP  Error updating labels: {detail}")
+        return {'issue': issue_key, 'result': 'failed', 'detail': detail}
+    except Exception as e:
+        logging.error(f"Issue {issue_key} | Unexpected Error updating labels: {e}")
+        return {'issue': issue_key, 'result': 'failed', 'detail': str(e)}
+
+
+def bulk_add_labels(jira, keys, labels, max_workers=label_workers):
+    if not labels:
+        return []
+    keys = list(dict.fromkeys(issue_key.upper() for issue_key in keys))
+    # THE JQL ONLY RETURNS ISSUES MISSING A LABEL - validateQuery=warn SO AN UNKNOWN KEY DOES NOT FAIL THE QUERY
+    to_label, found = [], set()
+    for i in range(0, len(keys), keys_per_query):
+        chunk = keys[i:i + keys_per_query]
+        missing = [
+            issue['key'].upper()
+            for issue in search_issues(missing_labels_jql(chunk, labels), ['key'], validate_query='warn')
+        ]
+        to_label.extend(missing)
+        found.update(missing)
+        if len(missing) < len(chunk):
+            # KEYS-ONLY SEARCH TO TELL "ALREADY LABELED" FROM "DOES NOT EXIST OR IS NOT VISIBLE"
+            found.update(
+                issue['key'].upper()
+                for issue in search_issues(keys_jql(chunk), ['key'], validate_query='warn')
             )
-        try:
-            transition_issue_by_id(
-                jira_api,
+    logging.info(f"{len(to_label)} of {len(keys)} issue(s) are missing labels {labels}.")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        report = list(executor.map(lambda issue_key: add_labels(jira, issue_key, labels), to_label))
+
+    to_label_set = set(to_label)
+    not_found = [issue_key for issue_key in keys if issue_key not in found]
+    unchanged = [issue_key for issue_key in keys if issue_key in found and issue_key not in to_label_set]
+    report.extend(
+        {'issue': issue_key, 'result': 'unchanged', 'detail': 'already has the requested labels'}
+        for issue_key in unchanged
+    )
+    report.extend(
+        {'issue': issue_key, 'result': 'not_found', 'detail': 'issue does not exist or is not visible'}
+        for issue_key in not_found
+    )
+    failed = sum(1 for row in report if row['result'] == 'failed')
+    logging.info(f"Labels: {len(to_label) - failed} labeled, {len(unchanged)} unchanged, "
+                 f"{len(not_found)} not found, {failed} failed.")
+    return report
+
+
+# BULK TRANSITIONS
+def attempt_transition(jira, issue, transition_id, fields=None, cache=transition_cache):
+    # RETURNS (RESULT, DETAIL, RETRYABLE) - RESULT IS transitioned, skipped, unavailable OR failed
+    issue_key = issue['key']
+    transition_id = int(transition_id)
+    context = workflow_context(issue)
+    status = ((issue.get('fields') or {}).get('status') or {}).get('name')
+    try:
+        transitions = cache.transitions(jira, issue_key, context)
+        if transition_id not in transitions:
+            if status is not None and status == cache.target_status(transition_id):
+                logging.info(f"Issue {issue_key} already on status '{status}'.")
+                return 'skipped', f"already on status '{status}'", False
+            # THE TARGET STATUS MAY NOT BE KNOWN YET - bulk_transition DECIDES ONCE EVERY ISSUE WAS TRIED
+            return 'unavailable', f"transition ID={transition_id} not available from status '{status}'", False
+
+        response = post_transition(jira, issue_key, transition_id, fields)
+        if response.status_code == 400:
+            cache.invalidate(context)
+        response.raise_for_status()
+        logging.info(f"Issue {issue_key} transitioned using ID={transition_id}")
+        return 'transitioned', f"'{status}' -> '{transitions[transition_id]}'", False
+
+    except HTTPError as err:
+        response = err.response
+        if response is None:
+            logging.error(f"Issue {issue_key} | Transition failed: {err}")
+            return 'failed', str(err), False
+        logging.error(
+            f"Issue {issue_key} | Transition failed: {response.status_code} - {response.text}"
+        )
+        return 'failed', f"{response.status_code} - {response.text}", response.status_code in RETRYABLE_STATUS
+    except (ConnectionError, Timeout) as e:
+        logging.error(f"Issue {issue_key} | Network error on transition: {e}")
+        return 'failed', f"{type(e).__name__}: {e}", True
+    except Exception as e:
+        logging.error(f"Issue {issue_key} | Unexpected Error on transition: {e}")
+        return 'failed', str(e), False
+
+
+def refresh_issues(keys):
+    # RETRIED ISSUES ARE SEARCHED AGAIN - THEIR STATUS MAY HAVE CHANGED SINCE THE FIRST ATTEMPT
+    issues = []
+    for i in range(0, len(keys), keys_per_query):
+        chunk_jql = 'key in ({})'.format(','.join(f'"{k}"' for k in keys[i:i + keys_per_query]))
+        issues.extend(search_issues(chunk_jql, issue_fields))
+    return issues
+
+
+def bulk_transition(jira, issues, transition_id, fields=None, max_workers=transition_workers,
+                    max_attempts=transition_attempts, cache=transition_cache, journal=None):
+    ledger = {}
+    order = [issue['key'] for issue in issues]
+    queue = list(issues)
+    if journal is not None:
+        for issue in queue:
+            row = journal.get("transition", issue['key'], transition_id)
+            if row is not None:
+                ledger[issue['key']] = row
+        queue = [issue for issue in queue if issue['key'] not in ledger]
+    attempt = 0
+    while queue:
+        attempt += 1
+        if attempt > 1:
+            wait = backoff(attempt - 1)
+            logging.info(f"Retrying {len(queue)} issue(s), attempt {attempt}/{max_attempts} in {wait:.1f} seconds...")
+            sleep(wait)
+            keys = [issue['key'] for issue in queue]
+            queue = refresh_issues(keys)
+            for issue_key in set(keys) - {issue['key'] for issue in queue}:
+                ledger[issue_key] = {'issue': issue_key, 'result': 'failed',
+                                     'detail': 'issue not found on retry', 'attempts': attempt}
+
+        def run(issue, attempt=attempt):
+            outcome = attempt_transition(jira, issue, transition_id, fields, cache)
+            if journal is not None and outcome[0] in ('transitioned', 'skipped'):
+                # JOURNALED AS SOON AS JIRA CONFIRMS, NOT AT THE END OF THE ROUND
+                journal.record("transition", issue['key'], transition_id, data={
+                    'issue': issue['key'], 'result': outcome[0], 'detail': outcome[1], 'attempts': attempt
+                })
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(run, queue))
+
+        retry = []
+        for issue, (result, detail, retryable) in zip(queue, outcomes):
+            if retryable and attempt < max_attempts:
+                retry.append(issue)
+                continue
+            if result == 'unavailable':
+                status = ((issue.get('fields') or {}).get('status') or {}).get('name')
+                if status is not None and status == cache.target_status(int(transition_id)):
+                    result, detail = 'skipped', f"already on status '{status}'"
+                else:
+                    result = 'failed'
+                logging.info(f"Issue {issue['key']} | {detail}")
+            ledger[issue['key']] = {'issue': issue['key'], 'result': result, 'detail': detail, 'attempts': attempt}
+            if journal is not None and result == 'skipped' and not journal.done("transition", issue['key'], transition_id):
+                journal.record("transition", issue['key'], transition_id, data=ledger[issue['key']])
+        queue = retry
+
+    report = [ledger[issue_key] for issue_key in order if issue_key in ledger]
+    totals = {result: sum(1 for row in report if row['result'] == result)
+              for result in ('transitioned', 'skipped', 'failed')}
+    logging.info(
+        f"Transitions: {totals['transitioned']} transitioned, {totals['skipped']} skipped, {totals['failed']} failed."
+    )
+    return report
+
+
+def update_labels_serial(issue):
+    issue_key = issue['key']
+    try:
+        existing_labels = issue['fields'].get('labels', [])
+        existing_labels = [str(lbl) for lbl in existing_labels]
+        labels_to_add = [
+            lbl for lbl in new_label_here
+            if lbl not in existing_labels
+        ]
+        if labels_to_add:
+            updated_labels = existing_labels + labels_to_add
+            jira_api.update_issue_field(
                 issue_key,
-                which_status_id,
-                fields={
-                    "customfield_33201": "Expired."
-                    #                    "resolution": {
-                    #                        "id": "10901"
-                    #                    }
-                }
-            )
-        except Exception as e:
-            logging.error(
-                f"Issue {issue_key} | Transition failed: {e}"
+                fields={"labels": updated_labels}
             )
+            logging.info(f"Labels add to the issue {issue_key}: {labels_to_add}")
+        else:
+            logging.info(f"Issue {issue_key} already has the requested labels.")
+    except HTTPError as err:
+        logging.error(
+            f"Issue {issue_key} | HTTP  Error updating labels: "
+            f"{err.response.status_code} - {err.response.text}"
+        )
+    except Exception as e:
+        logging.error(
+            f"Issue {issue_key} | Unexpected Error updating labels: {e}"
+        )
+
+
+def main():
+    if bulk_labels and new_label_here:
+        write_report(label_report_file, bulk_add_labels(jira_api, issue_keys, new_label_here))
+
+    all_issues = search_issues(jql_query, issue_fields)
+    logging.info(f"Total de Issues carregados: {len(all_issues)}")
+
+    # UPDATING LABELS AND TRANSITIONS
+    if not all_issues:
+        logging.info("Nenhum Issue encontrado.")
+        return
+
+    if not bulk_labels:
+        for issue in all_issues:
+            update_labels_serial(issue)
+
+    journal = Journal(journal_file, run_id(jql_query, which_status_id, transition_fields))
+    ledger = bulk_transition(jira_api, all_issues, which_status_id, fields=transition_fields, journal=journal)
+    write_report(transition_report_file, ledger, fieldnames=('issue', 'result', 'detail', 'attempts'))
+    if any(row['result'] == 'failed' for row in ledger):
+        journal.close()
+    else:
+        journal.finish()
+
+    logging.info(f"{len(all_issues)} issues processed.")
+
 
-logging.info(f"{len(all_issues)} issues processed.")
+if __name__ == "__main__":
+    main()
 
 # transition code for "motivation" field
 # transition_issue_by_id(
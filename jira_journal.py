@@ -0,0 +1,109 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+def run_id(*parts: Any) -> str:
+    # SAME INPUTS, SAME RUN - A JOURNAL WRITTEN FOR DIFFERENT INPUTS IS NEVER REPLAYED
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _step_key(step) -> Tuple[str, ...]:
+    return tuple(str(part) for part in step)
+
+
+# APPEND-ONLY LOG OF FINISHED STEPS (PROJECT x FIELD, ROLE x ACTOR, ISSUE x TRANSITION...) #
+# EVERY RECORD IS FSYNC'D BEFORE record() RETURNS; WITHOUT A PATH THE STEPS ARE ONLY KEPT IN MEMORY #
+class Journal:
+
+    def __init__(self, path: Optional[str] = None, run: Optional[str] = None):
+        self.path = path
+        self.run = run
+        self._steps: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self._open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._steps)
+
+    # ------------------------------------------------------------------
+    # REPLAY
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        entries, torn = self._replay()
+        if entries is None or torn:
+            # NEW RUN, OR A TORN LAST LINE - REWRITE THE VALID PART SO NEW RECORDS START ON A CLEAN LINE
+            with open(self.path, "w", encoding="utf-8") as file:
+                file.write(json.dumps({"run": self.run, "started": datetime.now().isoformat()}) + "\n")
+                for entry in entries or []:
+                    file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._steps:
+            print(f"Journal '{self.path}': resuming, {len(self._steps)} step(s) already done.")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return None, False
+        with open(self.path, "r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        entries, torn = [], False
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                torn = True
+                break
+        if not entries or entries[0].get("run") != self.run:
+            return None, False
+        entries = entries[1:]
+        for entry in entries:
+            self._steps[_step_key(entry["step"])] = entry.get("data")
+        return entries, torn
+
+    # ------------------------------------------------------------------
+    # STEPS
+    # ------------------------------------------------------------------
+
+    def done(self, *step) -> bool:
+        with self._lock:
+            return _step_key(step) in self._steps
+
+    def get(self, *step, default: Any = None) -> Any:
+        with self._lock:
+            return self._steps.get(_step_key(step), default)
+
+    def record(self, *step, data: Any = None):
+        entry = {"step": list(_step_key(step)), "data": data}
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._steps[_step_key(step)] = data
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        # THE RUN ENDED WITHOUT FAILURES - NOTHING LEFT TO RESUME
+        self.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
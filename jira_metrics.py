@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import atexit
+import threading
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SET JIRA_METRICS_FILE (.json OR .prom) TO TURN METRICS ON AND SAVE THEM WHEN THE SCRIPT ENDS #
+METRICS_FILE = os.getenv("JIRA_METRICS_FILE")
+
+# LATENCY HISTOGRAM BUCKETS IN SECONDS (UPPER BOUNDS) #
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_ISSUE_KEY = re.compile(r"^[A-Za-z][A-Za-z0-9_]*-\d+$")
+_KEY_PARENTS = {"project", "projects", "issue", "user", "group"}
+
+Hook = Callable[[Dict[str, Any]], None]
+
+
+def endpoint_template(url: str) -> str:
+    # https://jira/rest/api/2/project/ABC/role/10002 -> /rest/api/2/project/{key}/role/{id}
+    path = urlsplit(url).path
+    rest = path.find("/rest/")
+    if rest > 0:
+        path = path[rest:]
+    parts = path.rstrip("/").split("/")
+    for i in range(1, len(parts)):
+        part = parts[i]
+        if part.isdigit() and parts[i - 1] != "api":
+            parts[i] = "{id}"
+        elif _ISSUE_KEY.match(part):
+            parts[i] = "{key}"
+        elif parts[i - 1] in _KEY_PARENTS and part not in ("search", "picker"):
+            parts[i] = "{key}"
+    return "/".join(parts) or "/"
+
+
+class _Endpoint:
+
+    __slots__ = ("requests", "errors", "retries", "rate_limited", "seconds", "bytes", "buckets", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.statuses: Dict[str, int] = {}
+
+
+class Metrics:
+
+    def __init__(self, enabled: bool = False):
+        # CHECKED BEFORE ANY WORK - WHEN OFF, A REQUEST ONLY PAYS FOR ONE ATTRIBUTE READ
+        self.enabled = enabled
+        self.hooks: List[Hook] = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints: Dict[str, _Endpoint] = {}
+            self.sleep_seconds: Dict[str, float] = {}
+
+    def add_hook(self, hook: Hook):
+        # hook(event) IS CALLED FOR EVERY "request", "retry", "rate_limit" AND "sleep" EVENT
+        self.hooks.append(hook)
+        self.enabled = True
+
+    def remove_hook(self, hook: Hook):
+        self.hooks.remove(hook)
+
+    def _endpoint(self, method: str, endpoint: str) -> _Endpoint:
+        name = f"{method.upper()} {endpoint}"
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = _Endpoint()
+        return stats
+
+    def _emit(self, event: Dict[str, Any]):
+        for hook in self.hooks:
+            hook(event)
+
+    # ------------------------------------------------------------------
+    # RECORDING
+    # ------------------------------------------------------------------
+
+    def observe(self, method: str, endpoint: str, status: Optional[int], seconds: float, size: int = 0):
+        bucket = 0
+        while bucket < len(BUCKETS) and seconds > BUCKETS[bucket]:
+            bucket += 1
+        with self._lock:
+            stats = self._endpoint(method, endpoint)
+            stats.requests += 1
+            stats.seconds += seconds
+            stats.bytes += size
+            stats.buckets[bucket] += 1
+            status_name = str(status) if status is not None else "error"
+            stats.statuses[status_name] = stats.statuses.get(status_name, 0) + 1
+            if status is None or status >= 400:
+                stats.errors += 1
+        if self.hooks:
+            self._emit({"event": "request", "method": method, "endpoint": endpoint, "status": status,
+                        "seconds": seconds, "bytes": size})
+
+    def retry(self, method: str, endpoint: str, reason: str, wait: float):
+        with self._lock:
+            self._endpoint(method, endpoint).retries += 1
+        if self.hooks:
+            self._emit({"event": "retry", "method": method, "endpoint": endpoint, "reason": reason, "wait": wait})
+        self.slept("backoff", wait)
+
+    def rate_limited(self, method: str, endpoint: str, wait: float):
+        with self._lock:
+            self._endpoint(method, endpoint).rate_limited += 1
+        if self.hooks:
+            self._emit({"event": "rate_limit", "method": method, "endpoint": endpoint, "wait": wait})
+        self.slept("rate_limit", wait)
+
+    def slept(self, reason: str, seconds: float):
+        # reason: "limiter" (TOKEN BUCKET), "rate_limit" (429 / Retry-After) OR "backoff" (5XX / CONNECTION)
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.sleep_seconds[reason] = self.sleep_seconds.get(reason, 0.0) + seconds
+        if self.hooks:
+            self._emit({"event": "sleep", "reason": reason, "seconds": seconds})
+
+    # ------------------------------------------------------------------
+    # OUTPUT
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                name: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "rate_limited": stats.rate_limited,
+                    "seconds": round(stats.seconds, 6),
+                    "avg_seconds": round(stats.seconds / stats.requests, 6) if stats.requests else 0.0,
+                    "bytes": stats.bytes,
+                    "statuses": dict(stats.statuses),
+                    "histogram": {
+                        **{f"le_{bound:g}": count for bound, count in zip(BUCKETS, stats.buckets)},
+                        "le_inf": stats.buckets[-1],
+                    },
+                }
+                for name, stats in sorted(self.endpoints.items())
+            }
+            sleep_seconds = dict(self.sleep_seconds)
+        return {
+            "requests": sum(e["requests"] for e in endpoints.values()),
+            "retries": sum(e["retries"] for e in endpoints.values()),
+            "rate_limited": sum(e["rate_limited"] for e in endpoints.values()),
+            "bytes": sum(e["bytes"] for e in endpoints.values()),
+            "sleep_seconds": sleep_seconds,
+            "endpoints": endpoints,
+        }
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            items = sorted(self.endpoints.items())
+            sleep_seconds = sorted(self.sleep_seconds.items())
+        lines = [
+            "# HELP jira_request_duration_seconds Jira request latency per endpoint template.",
+            "# TYPE jira_request_duration_seconds histogram",
+        ]
+        for name, stats in items:
+            method, endpoint = name.split(" ", 1)
+            labels = f'method="{method}",endpoint="{endpoint}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'jira_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'jira_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.requests}')
+            lines.append(f"jira_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}")
+            lines.append(f"jira_request_duration_seconds_count{{{labels}}} {stats.requests}")
+        for metric, attribute, help_text in (
+                ("jira_request_errors_total", "errors", "Jira answers >= 400 or without response."),
+                ("jira_request_retries_total", "retries", "Requests retried after 5xx or connection errors."),
+                ("jira_rate_limited_total", "rate_limited", "HTTP 429 answers."),
+                ("jira_response_bytes_total", "bytes", "Response bytes received."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in items:
+                method, endpoint = name.split(" ", 1)
+                lines.append(f'{metric}{{method="{method}",endpoint="{endpoint}"}} {getattr(stats, attribute)}')
+        lines.append("# HELP jira_sleep_seconds_total Time spent waiting before requests.")
+        lines.append("# TYPE jira_sleep_seconds_total counter")
+        for reason, seconds in sleep_seconds:
+            lines.append(f'jira_sleep_seconds_total{{reason="{reason}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        # .prom IS WRITTEN IN THE PROMETHEUS TEXTFILE FORMAT (node_exporter textfile collector), ANYTHING ELSE AS JSON
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            if path.endswith(".prom"):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), file, indent=2)
+        os.replace(temp_path, path)
+
+    def summary(self) -> str:
+        data = self.snapshot()
+        lines = [f"{'endpoint':<60}{'requests':>9}{'avg ms':>9}{'retries':>8}{'429':>6}{'KB':>10}"]
+        for name, stats in sorted(data["endpoints"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(
+                f"{name[:59]:<60}{stats['requests']:>9}{stats['avg_seconds'] * 1000:>9.1f}"
+                f"{stats['retries']:>8}{stats['rate_limited']:>6}{stats['bytes'] / 1024:>10.1f}"
+            )
+        sleeps = ", ".join(f"{reason} {seconds:.1f}s" for reason, seconds in data["sleep_seconds"].items())
+        lines.append(f"Sleeping: {sleeps or 'none'}")
+        return "\n".join(lines)
+
+
+# SHARED BY JiraSession, JiraClient AND AsyncJiraClient #
+metrics = Metrics(enabled=bool(METRICS_FILE))
+if METRICS_FILE:
+    atexit.register(metrics.dump, METRICS_FILE)
@@ -1,7 +1,12 @@
 from enum import IntEnum
-from typing import Any
+from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
 from requests.exceptions import (HTTPError, SSLError, ConnectionError, Timeout)
 from jira_auth import JiraClient
+from jira_journal import Journal
+
+# FIELD UPDATES SENT AT THE SAME TIME PER PROJECT #
+FIELD_WORKERS = 4
 
 
 class ProjectField(IntEnum):
@@ -26,6 +31,39 @@ class ProjectField(IntEnum):
     SCRUM = 149
 
 
+def _comparable(value: Any):
+    # PROFIELDS ANSWERS WITH OPTION/USER OBJECTS, WE SEND PLAIN VALUES - BOTH ARE REDUCED TO THE SAME SHAPE
+    # EMPTY VALUES (None, "", [] OR A FIELD MISSING FROM THE ANSWER) ARE ALL THE SAME
+    if value is None or value == "" or value == []:
+        return ""
+    if isinstance(value, dict):
+        for key in ("value", "name", "key", "id"):
+            if key in value:
+                return _comparable(value[key])
+        return str(value)
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(str(_comparable(item)) for item in value))
+    return str(value)
+
+
+def _parse_values(items) -> Dict[int, Any]:
+    values = {}
+    for item in items or []:
+        field = item.get("field")
+        field_id = field.get("id") if isinstance(field, dict) else item.get("id")
+        if field_id is not None:
+            values[int(field_id)] = item.get("value")
+    return values
+
+
+def _changed(current: Dict[int, Any], fields: Dict[ProjectField, Any]) -> Dict[ProjectField, Any]:
+    return {
+        field: value
+        for field, value in fields.items()
+        if _comparable(current.get(int(field))) != _comparable(value)
+    }
+
+
 class Profields(JiraClient):
 
     def __init__(self, session, base_url):
@@ -57,31 +95,114 @@ class Profields(JiraClient):
             print("Network Error: Unable to connect to Jira. Check your company network or VPN connection.")
             raise SystemExit(1)
 
+    # ------------------------------------------------------------------
+    # READ CURRENT VALUES
+    # ------------------------------------------------------------------
+
+    def get_values(self, project: str) -> Dict[int, Any]:
+        url = (
+            f"{self.base_url}"
+            f"/rest/profields/api/2.0/values/projects/"
+            f"{project}/fields"
+        )
+        try:
+            response = self.request("GET", url)
+        except (SSLError, ConnectionError, Timeout):
+            print("Network Error: Unable to connect to Jira. Check your company network or VPN connection.")
+            raise SystemExit(1)
+        return _parse_values(response.json())
+
+    def changed_fields(self, project: str, fields: Dict[ProjectField, Any]) -> Optional[Dict[ProjectField, Any]]:
+        # None WHEN THE CURRENT VALUES CAN'T BE READ (E.G. A PROFIELDS VERSION WITHOUT THIS ENDPOINT)
+        # - THE CALLER THEN SENDS EVERY FIELD, LIKE skip_unchanged=False; ONLY 401/403 STOP THE PROJECT
+        try:
+            current = self.get_values(project)
+        except HTTPError as e:
+            response = e.response
+            if response is not None and response.status_code in (401, 403):
+                raise
+            status = response.status_code if response is not None else "no response"
+            print(f"WARNING: could not read current values of project '{project}' ({status}), updating every field.")
+            return None
+        return _changed(current, fields)
+
     # ------------------------------------------------------------------
     # UPDATE MULTIPLE FIELDS
     # ------------------------------------------------------------------
 
-    def update_multifields(self, project: str, fields: dict[ProjectField, Any]) -> bool:
-        for field, value in fields.items():
-            print(f"Updating {field.name} -> {value}")
+    def _update_and_record(self, project: str, field: ProjectField, value: Any, journal: Optional[Journal]):
+        result = self.update_onefield(project, field, value)
+        if journal is not None:
+            journal.record("field", project, int(field))
+        return result
+
+    def _report_error(self, project: str, e: HTTPError) -> bool:
+        response = e.response
+        if response is None:
+            print("HTTPError without response object")
+            print(e)
+            return False
+        status_code = response.status_code
+        if status_code in (400, 401, 403, 405):
+            print(
+                f"API Returned {status_code} - Cannot update project '{project}'."
+            )
+            return False
+        print(
+            f"Unexpected error updating project '{project}'."
+        )
+        print(f"HTTP Status: {status_code}")
+        print(response.text)
+        return False
+
+    def update_multifields(
+            self,
+            project: str,
+            fields: dict[ProjectField, Any],
+            skip_unchanged: bool = True,
+            max_workers: int = FIELD_WORKERS,
+            journal: Optional[Journal] = None
+    ) -> bool:
+        if journal is not None:
+            # FIELDS ALREADY WRITTEN BY AN INTERRUPTED RUN ARE NOT READ OR SENT AGAIN
+            fields = {
+                field: value
+                for field, value in fields.items()
+                if not journal.done("field", project, int(field))
+            }
+            if not fields:
+                return True
+        if skip_unchanged:
             try:
-                self.update_onefield(project, field, value)
+                changed = self.changed_fields(project, fields)
             except HTTPError as e:
-                response = e.response
-                if response is None:
-                    print("HTTPError without response object")
-                    print(e)
-                    return False
-                status_code = response.status_code
-                if status_code in (400, 401, 403, 405):
-                    print(
-                        f"API Returned {status_code} - Cannot update project '{project}'."
-                    )
-                    return False
-                print(
-                    f"Unexpected error updating project '{project}'."
-                )
-                print(f"HTTP Status: {status_code}")
-                print(response.text)
-                return False
+                return self._report_error(project, e)
+            if changed is not None:
+                unchanged = len(fields) - len(changed)
+                if unchanged:
+                    print(f"{unchanged} field(s) already up to date in project '{project}'.")
+                fields = changed
+        if not fields:
+            return True
+
+        for field, value in fields.items():
+            print(f"Updating {field.name} -> {value}")
+        # THE FIRST FAILURE STOPS THE PROJECT: UPDATES NOT STARTED YET ARE CANCELLED
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(fields))) as executor:
+            futures = [
+                executor.submit(self._update_and_record, project, field, value, journal)
+                for field, value in fields.items()
+            ]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in futures:
+                if future.cancelled() or not future.done():
+                    continue
+                error = future.exception()
+                if error is None:
+                    continue
+                if isinstance(error, HTTPError):
+                    return self._report_error(project, error)
+                raise error
         return True
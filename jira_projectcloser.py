@@ -1,14 +1,22 @@
 from jira_profields import ProjectField, Profields
-from jira_auth import session, BASE_URL
+from jira_auth import session, BASE_URL, rate_limiter
 from jira_roles import JiraRoles
+from jira_journal import Journal, run_id
+from jira_catalog import get_catalog
 from dotenv import load_dotenv
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import date
 from typing import Any
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
+# PROJECTS CLOSED AT THE SAME TIME - THE REQUEST RATE IS CAPPED BY THE SHARED RATE LIMITER OF jira_auth.py #
+PROJECT_WORKERS = 4
+
+# FINISHED STEPS ARE JOURNALED HERE - AN INTERRUPTED RUN WITH THE SAME INPUTS RESUMES WHERE IT STOPPED #
+JOURNAL_FILE = "projectcloser.journal"
+
 KEEP_GROUPS = [
     "XXXXXXXXXXXX",
     "XXXXXXXXXXXXXXXXX",
@@ -36,6 +44,9 @@ FIELDS = {
     ProjectField.END_DATE: date.today().isoformat(),
 }
 
+# VALUES THAT CHANGE BETWEEN RUNS (TODAY'S DATE) - LEFT OUT OF THE JOURNAL RUN ID AND FROZEN IN THE JOURNAL #
+VOLATILE_FIELDS = (ProjectField.END_DATE,)
+
 
 class ProjectCloser:
 
@@ -47,12 +58,13 @@ class ProjectCloser:
             self,
             project: str,
             keep_groups: List[str],
-            fields: Dict[ProjectField, Any]
+            fields: Dict[ProjectField, Any],
+            journal: Optional[Journal] = None
     ):
         print("\n############################# CLOSING PROJECT STARTED #############################")
         print(f"\nClosing Project: {project}...")
         print(f"Updating project fields...")
-        updated = self.profields.update_multifields(project, fields)
+        updated = self.profields.update_multifields(project, fields, journal=journal)
         if not updated:
             print("\n##################################### SUMMARY #####################################")
             print(f"Project {project} was not closed.")
@@ -60,46 +72,99 @@ class ProjectCloser:
             return None
         return self.roles.clean_project(
             project,
-            keep_groups
+            keep_groups,
+            journal=journal
         )
 
     def close_projects(
             self,
             projects: List[str],
             keep_groups: List[str],
-            fields: Dict[ProjectField, Any]
+            fields: Dict[ProjectField, Any],
+            max_workers: int = PROJECT_WORKERS,
+            journal: Optional[Journal] = None
     ):
         results = {}
         failed = []
-
-        for i, project in enumerate(projects):
-            result = self.close_project(
-                project=project,
-                keep_groups=keep_groups,
-                fields=fields
-            )
-            results[project] = result
-
-            if result is None:
-                failed.append(project)
-
-            if i < len(projects) - 1:
-                print("\nWaiting 60 seconds before the next project...")
-                time.sleep(60)
+        if journal is not None:
+            for project in projects:
+                if journal.done("project", project):
+                    print(f"Project {project} already closed (journal).")
+                    results[project] = journal.get("project", project)
+            projects = [project for project in projects if project not in results]
+
+        limit = f"{rate_limiter.rate:.0f} requests/s" if rate_limiter.rate else "set by the server"
+        print(f"\nClosing {len(projects)} project(s), {max_workers} at a time (limit: {limit})...")
+        # EACH PROJECT STILL RUNS IN ORDER (FIELDS, THEN ROLES); ONLY DIFFERENT PROJECTS OVERLAP
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.close_project,
+                    project=project,
+                    keep_groups=keep_groups,
+                    fields=fields,
+                    journal=journal
+                )
+                for project in projects
+            ]
+            for project, future in zip(projects, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Project {project} failed: {type(e).__name__}: {e}")
+                    result = None
+                except BaseException:
+                    # SystemExit (SSL / AUTH ERRORS) OR Ctrl+C - QUEUED PROJECTS ARE NOT STARTED
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                results[project] = result
+
+                if result is None:
+                    failed.append(project)
+                elif journal is not None:
+                    journal.record("project", project, data=result)
 
         return results, failed
 
 
 def main():
-    projects = ["PTI"]
+    # PROJECT KEYS OR NAMES - NAMES ARE RESOLVED THROUGH THE CACHED PROJECT CATALOG
+    projects, unknown = get_catalog().resolve_all(["PTI"])
+    if unknown:
+        print(f"Skipping unresolved projects: {unknown}")
+    if not projects:
+        return
 
     closer = ProjectCloser()
+    journal = Journal(
+        JOURNAL_FILE,
+        run_id(
+            projects,
+            KEEP_GROUPS,
+            {int(field): value for field, value in FIELDS.items() if field not in VOLATILE_FIELDS}
+        )
+    )
+    # A RUN RESUMED ON ANOTHER DAY KEEPS THE END_DATE OF THE DAY IT STARTED
+    fields = dict(FIELDS)
+    frozen = journal.get("volatile_fields")
+    if frozen is None:
+        journal.record(
+            "volatile_fields",
+            data={str(int(field)): FIELDS[field] for field in VOLATILE_FIELDS if field in FIELDS}
+        )
+    else:
+        fields.update({ProjectField(int(field)): value for field, value in frozen.items()})
 
     results, failed = closer.close_projects(
         projects=projects,
         keep_groups=KEEP_GROUPS,
-        fields=FIELDS
+        fields=fields,
+        journal=journal
     )
+    if failed:
+        journal.close()
+    else:
+        journal.finish()
 
     print("\n##################################### SUMMARY #####################################")
 
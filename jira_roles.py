@@ -2,6 +2,10 @@ from jira_auth import JiraClient
 from typing import Dict, List, Optional
 from jira_auth import session, BASE_URL
 from requests.exceptions import HTTPError
+from concurrent.futures import ThreadPoolExecutor
+from jira_cache import TTLCache
+from jira_journal import Journal
+from jira_catalog import get_catalog
 
 #groups to be keep in the group for safety, and adding a group also for safety of not locking the user out
 KEEP_GROUPS = [
@@ -12,31 +16,66 @@ KEEP_GROUPS = [
 ]
 
 GOVERNANCE_GROUP = "ITGOV"
+GOVERNANCE_ROLES = [
+    "Administrators",
+    "Estimate Manager",
+    "Initiative Leader Delegate",
+    "Technical Leader",
+]
+
+USER_ACTOR = "atlassian-user-role-actor"
+GROUP_ACTOR = "atlassian-group-role-actor"
+
+# ROLE REQUESTS (GET / DELETE) SENT AT THE SAME TIME PER PROJECT #
+ROLE_WORKERS = 8
+
+# ROLE MAPS AND ACTOR LISTS - ENTRIES, SECONDS TO LIVE AND OPTIONAL FILE TO KEEP THEM BETWEEN RUNS #
+# ONLY READ-ONLY CALLERS USE IT - clean_project ALWAYS RE-READS THE PROJECT BEFORE DELETING ANYTHING #
+ROLE_CACHE_SIZE = 4096
+ROLE_CACHE_TTL = 6 * 60 * 60
+ROLE_CACHE_FILE = None
+
+
+def _actor_names(role_data, actor_type: str) -> List[str]:
+    return [
+        actor["name"]
+        for actor in role_data["actors"]
+        if actor["type"] == actor_type
+    ]
 
 
 class JiraRoles(JiraClient):
 
-    def __init__(self, session, base_url):
+    def __init__(self, session, base_url, max_workers: int = ROLE_WORKERS, cache: Optional[TTLCache] = None):
         super().__init__(session, base_url)
-        self._role_cache = {}
+        self._role_cache = cache if cache is not None else TTLCache(ROLE_CACHE_SIZE, ROLE_CACHE_TTL, ROLE_CACHE_FILE)
+        self.max_workers = max_workers
 
     # ------------------------------------------------------------------
     # CACHE
+    # KEYS: "roles:<PROJECT>" -> ROLE MAP, "actors:<ROLE URL>" -> ROLE DATA WITH ITS ACTORS
     # ------------------------------------------------------------------
 
     def clear_cache(self, project: Optional[str] = None):
         if project is None:
             self._role_cache.clear()
-        else:
-            self._role_cache.pop(project, None)
+            return
+        roles = self._role_cache.pop(f"roles:{project}") or {}
+        for role in roles.values():
+            self._role_cache.pop(f"actors:{role['url']}")
+
+    def _invalidate_role(self, role_url: str):
+        self._role_cache.pop(f"actors:{role_url}")
 
     # ------------------------------------------------------------------
     # PRIVATE METHODS
     # ------------------------------------------------------------------
 
-    def _load_project_roles(self, project: str):
-        if project in self._role_cache:
-            return
+    def _load_project_roles(self, project: str) -> Dict[str, dict]:
+        # RETURNS THE ROLE MAP ITSELF - READING THE CACHE AGAIN COULD MISS AN ENTRY THAT EXPIRED IN BETWEEN
+        roles = self._role_cache.get(f"roles:{project}")
+        if roles is not None:
+            return roles
         try:
             response = self.request(
                 "GET",
@@ -49,8 +88,8 @@ class JiraRoles(JiraClient):
                     f"Skipping project '{project}': "
                     f"No permission to access Jira roles."
                 )
-                self._role_cache[project] = {}
-                return
+                # NOT CACHED - A PERMISSION GRANTED LATER (OR A STALE ROLE_CACHE_FILE) MUST NOT HIDE THE ROLES
+                return {}
 
             raise
         roles = {}
@@ -59,11 +98,11 @@ class JiraRoles(JiraClient):
                 "id": role_url.rstrip("/").split("/")[-1],
                 "url": role_url,
             }
-        self._role_cache[project] = roles
+        self._role_cache.set(f"roles:{project}", roles)
+        return roles
 
     def _get_role(self, project: str, role_name: str):
-        self._load_project_roles(project)
-        roles = self._role_cache.get(project, {})
+        roles = self._load_project_roles(project)
         if not roles:
             print(
                 f"Cannot access roles for project '{project}'."
@@ -76,18 +115,38 @@ class JiraRoles(JiraClient):
         return roles[role_name]
 
     def get_role_names(self, project: str) -> List[str]:
-        self._load_project_roles(project)
-        roles = self._role_cache.get(project)
-        if roles is None:
-            return []
-        return list(roles.keys())
+        return list(self._load_project_roles(project).keys())
 
     def _get_role_data(self, project: str, role_name: str):
         role = self._get_role(project, role_name)
         if role is None:
             return None
-        response = self.request("GET", role["url"])
-        return response.json()
+        role_data = self._role_cache.get(f"actors:{role['url']}")
+        if role_data is None:
+            role_data = self.request("GET", role["url"]).json()
+            self._role_cache.set(f"actors:{role['url']}", role_data)
+        return role_data
+
+    def _delete_actors(self, deletions: List[tuple], journal: Optional[Journal] = None):
+        # (ROLE URL, "user" OR "group", NAME) - JIRA TAKES ONE ACTOR PER DELETE, SO THEY ARE SENT IN PARALLEL
+        if journal is not None:
+            deletions = [deletion for deletion in deletions if not journal.done("actor", *deletion)]
+        if not deletions:
+            return
+
+        def delete(deletion):
+            role_url, parameter, value = deletion
+            self.request("DELETE", role_url, params={parameter: value})
+            if journal is not None:
+                journal.record("actor", *deletion)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(deletions))) as executor:
+                list(executor.map(delete, deletions))
+        finally:
+            # EVEN A PARTIAL FAILURE CHANGED THE ROLES - THE NEXT READ GOES BACK TO JIRA
+            for role_url in {deletion[0] for deletion in deletions}:
+                self._invalidate_role(role_url)
 
     def _remove_actors(
             self,
@@ -99,8 +158,28 @@ class JiraRoles(JiraClient):
         if not values:
             return
         role = self._get_role(project, role_name)
-        for value in values:
-            self.request("DELETE", role["url"], params={parameter: value})
+        self._delete_actors([(role["url"], parameter, value) for value in values])
+
+    def _add_actors(self, role_url: str, actors: Dict[str, List[str]]):
+        try:
+            response = self.request("POST", role_url, json=actors)
+        except Exception:
+            self._invalidate_role(role_url)
+            raise
+        # JIRA ANSWERS WITH THE UPDATED ROLE - IT REPLACES THE CACHED ACTORS (WRITE-THROUGH)
+        role_data = response.json()
+        if isinstance(role_data, dict) and "actors" in role_data:
+            self._role_cache.set(f"actors:{role_url}", role_data)
+        else:
+            self._invalidate_role(role_url)
+        return role_data
+
+    def get_actors(self, project: str, role_name: str) -> Dict[str, List[str]]:
+        role = self._get_role_data(project, role_name)
+        return {
+            "users": _actor_names(role, USER_ACTOR),
+            "groups": _actor_names(role, GROUP_ACTOR),
+        }
 
     # ------------------------------------------------------------------
     # USERS MANAGEMENT
@@ -108,18 +187,13 @@ class JiraRoles(JiraClient):
 
     def get_users(self, project: str, role_name: str) -> List[str]:
         role = self._get_role_data(project, role_name)
-        return [
-            actor["name"]
-            for actor in role["actors"]
-            if actor["type"] == "atlassian-user-role-actor"
-        ]
+        return _actor_names(role, USER_ACTOR)
 
     def add_users(self, project: str, role_name: str, users: List[str]):
         if not users:
             return
         role = self._get_role(project, role_name)
-        response = self.request("POST", role["url"], json={"user": users})
-        return response.json()
+        return self._add_actors(role["url"], {"user": users})
 
     def remove_users(self, project: str, role_name: str, users: List[str]):
         return self._remove_actors(
@@ -141,16 +215,19 @@ class JiraRoles(JiraClient):
 
     def get_groups(self, project: str, role_name: str) -> List[str]:
         role = self._get_role_data(project, role_name)
-        return [
-            actor["name"]
-            for actor in role["actors"]
-            if actor["type"] == "atlassian-group-role-actor"
-        ]
+        return _actor_names(role, GROUP_ACTOR)
 
-    def add_groups(self, project: str, role_name: str, groups: List[str]):
+    def add_groups(
+            self,
+            project: str,
+            role_name: str,
+            groups: List[str],
+            current_groups: Optional[List[str]] = None
+    ):
         if not groups:
             return
-        current_groups = self.get_groups(project, role_name)
+        if current_groups is None:
+            current_groups = self.get_groups(project, role_name)
         groups_to_add = [
             group
             for group in groups
@@ -159,8 +236,7 @@ class JiraRoles(JiraClient):
         if not groups_to_add:
             return
         role = self._get_role(project, role_name)
-        response = self.request("POST", role["url"], json={"group": groups_to_add})
-        return response.json()
+        return self._add_actors(role["url"], {"group": groups_to_add})
 
     def remove_groups(self, project: str, role_name: str, groups: List[str]):
 
@@ -187,54 +263,72 @@ class JiraRoles(JiraClient):
     # REMOVE ALL
     # ------------------------------------------------------------------
 
-    def clean_project(self, project: str, keep_groups: List[str]):
+    def clean_project(self, project: str, keep_groups: List[str], journal: Optional[Journal] = None):
         summary = {}
+        if journal is not None and journal.done("roles", project):
+            print(f"\nRoles of project {project} already cleaned (journal).")
+            return journal.get("roles", project)
         print(f"\nCleaning roles for project: {project}")
-        role_names = self.get_role_names(project)
+        # DELETIONS ARE NEVER COMPUTED FROM CACHED ACTORS - THEY MAY BE HOURS OLD OR FROM A PREVIOUS RUN
+        self.clear_cache(project)
+        roles = self._load_project_roles(project)
+        role_names = list(roles.keys())
         if not role_names:
             print(
                 f"Skipping role cleanup for '{project}': No Jira role access."
             )
             return summary
+
+        # ONE GET PER ROLE - EVERY ADD AND REMOVE BELOW IS COMPUTED FROM THIS SNAPSHOT
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(role_names))) as executor:
+            snapshot = dict(zip(
+                role_names,
+                executor.map(lambda role_name: self.get_actors(project, role_name), role_names)
+            ))
+
         print(f"Adding ICT Governance Brasil to the project: {project}")
-        for role_name in [
-            "Administrators",
-            "Estimate Manager",
-            "Initiative Leader Delegate",
-            "Technical Leader",
-        ]:
+        for role_name in GOVERNANCE_ROLES:
             self.add_groups(
                 project=project,
                 role_name=role_name,
-                groups=[GOVERNANCE_GROUP]
+                groups=[GOVERNANCE_GROUP],
+                current_groups=snapshot.get(role_name, {}).get("groups")
             )
+
         print(f"Removing users and groups from project: {project}")
+        deletions = []
         for role_name in role_names:
-            # ---------------- USERS ----------------
-            users = self.get_users(project, role_name)
-            if users:
-                self.remove_users(project, role_name, users)
-
-            # ---------------- GROUPS ----------------
-            groups = self.get_groups(project, role_name)
+            actors = snapshot[role_name]
+            # THE GOVERNANCE GROUP JUST ADDED IS NEVER REMOVED FROM ITS OWN ROLES
+            keep = set(keep_groups)
+            if role_name in GOVERNANCE_ROLES:
+                keep.add(GOVERNANCE_GROUP)
             groups_to_remove = [
-                g for g in groups
-                if g not in keep_groups
+                g for g in actors["groups"]
+                if g not in keep
             ]
-            if groups_to_remove:
-                self.remove_groups(project, role_name, groups_to_remove)
+            role_url = roles[role_name]["url"]
+            deletions.extend((role_url, "user", user) for user in actors["users"])
+            deletions.extend((role_url, "group", group) for group in groups_to_remove)
             summary[role_name] = {
-                "users": users,
+                "users": actors["users"],
                 "groups": groups_to_remove
             }
+        self._delete_actors(deletions, journal)
+        if journal is not None:
+            journal.record("roles", project, data=summary)
         print(f"Finished cleaning roles for project: {project}")
         return summary
 
 
 def main():
+    # PROJECT KEY OR NAME - NAMES ARE RESOLVED THROUGH THE CACHED PROJECT CATALOG
+    project = get_catalog().resolve("XXXXXGROUPCODE")
+    if project is None:
+        return
     jira_roles = JiraRoles(session, BASE_URL)
     result = jira_roles.clean_project(
-        "XXXXXGROUPCODE",
+        project,
         KEEP_GROUPS
     )
     print("\n################################ SUMMARY ################################")
@@ -0,0 +1,248 @@
+import json
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    issue_key TEXT PRIMARY KEY,
+    sort_key TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_issues_sort_key ON issues (sort_key);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _iso(value: Any) -> Optional[str]:
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else None
+
+
+def _iso_from_ddmmyyyy(value: Any) -> Optional[str]:
+    # rfc_target_start/end ARE dd/mm/YYYY STRINGS IN THE REPORT, STORED AS YYYY-MM-DD SO THEY SORT AND RANGE
+    if not isinstance(value, str) or len(value) != 10:
+        return None
+    return f"{value[6:10]}-{value[3:5]}-{value[0:2]}"
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return ", ".join(value) if isinstance(value, list) else str(value)
+
+
+# INDEXED COLUMNS - COLUMN: CONVERTER FROM THE NORMALIZED VALUE #
+INDEXED_COLUMNS: Dict[str, Callable[[Any], Any]] = {
+    "project_name": _text,
+    "issue_type": _text,
+    "status": _text,
+    "status_description": _text,
+    "assignee": _text,
+    "rfc_target_environment": _text,
+    "create_dt": _iso,
+    "update_dt": _iso,
+    "rfc_target_start": _iso_from_ddmmyyyy,
+    "rfc_target_end": _iso_from_ddmmyyyy,
+}
+
+
+# ------------------------------------------------------------------
+# SERIALIZATION
+# ------------------------------------------------------------------
+
+def _encode(value: Any):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def dumps(issue: Dict[str, Any]) -> str:
+    return json.dumps(issue, default=_encode, ensure_ascii=False)
+
+
+def loads(data: str) -> Dict[str, Any]:
+    return json.loads(data, object_hook=_decode)
+
+
+def key_order(issue_key: str) -> str:
+    # SAME ORDER AS JQL "ORDER BY key": PROJECT, THEN ISSUE NUMBER (PRJ-9 BEFORE PRJ-10)
+    project, _, number = issue_key.rpartition("-")
+    if not number.isdigit():
+        return issue_key
+    return f"{project}-{int(number):012d}"
+
+
+class IssueStore:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _migrate(self):
+        existing = {row[1] for row in self.connection.execute("PRAGMA table_info(issues)")}
+        missing = [column for column in INDEXED_COLUMNS if column not in existing]
+        with self.connection:
+            for column in missing:
+                self.connection.execute(f"ALTER TABLE issues ADD COLUMN {column}")
+            for column in INDEXED_COLUMNS:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_issues_{column} ON issues ({column})")
+        if missing and existing:
+            self._backfill()
+
+    def _backfill(self, batch_size: int = 1000):
+        # SNAPSHOTS WRITTEN BEFORE THE INDEXED COLUMNS EXISTED ARE REFILLED FROM THE JSON DATA, BATCH BY BATCH
+        last_rowid = 0
+        while True:
+            rows = self.connection.execute(
+                "SELECT rowid, data FROM issues WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            self.upsert(loads(data) for _, data in rows)
+
+    # ------------------------------------------------------------------
+    # METADATA
+    # ------------------------------------------------------------------
+
+    def get_meta(self, name: str) -> Optional[str]:
+        row = self.connection.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: Optional[str]):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO meta (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                (name, value)
+            )
+
+    # ------------------------------------------------------------------
+    # WRITE
+    # ------------------------------------------------------------------
+
+    def _insert(self, issues: Iterable[Dict[str, Any]], batch_size: int) -> int:
+        columns = ("issue_key", "sort_key", "data") + tuple(INDEXED_COLUMNS)
+        converters = tuple(INDEXED_COLUMNS.items())
+        sql = (
+            f"INSERT INTO issues ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(issue_key) DO UPDATE SET "
+            f"{', '.join(f'{column} = excluded.{column}' for column in columns[1:])}"
+        )
+        total = 0
+        issues = iter(issues)
+        while True:
+            batch = [
+                (issue["issue_key"], key_order(issue["issue_key"]), dumps(issue))
+                + tuple(convert(issue.get(column)) for column, convert in converters)
+                for issue in islice(issues, batch_size)
+            ]
+            if not batch:
+                return total
+            self.connection.executemany(sql, batch)
+            total += len(batch)
+
+    def upsert(self, issues: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        with self.connection:
+            return self._insert(issues, batch_size)
+
+    def replace_all(self, issues: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        with self.connection:
+            self.connection.execute("DELETE FROM issues")
+            return self._insert(issues, batch_size)
+
+    def delete_missing(self, issue_keys: Iterable[str], batch_size: int = 1000) -> int:
+        # KEEPS ONLY issue_keys - ROLLED BACK IF THE KEYS ITERATOR FAILS HALFWAY
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS keep_keys (issue_key TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM keep_keys")
+            issue_keys = iter(issue_keys)
+            while True:
+                batch = [(issue_key,) for issue_key in islice(issue_keys, batch_size)]
+                if not batch:
+                    break
+                self.connection.executemany("INSERT OR IGNORE INTO keep_keys (issue_key) VALUES (?)", batch)
+            removed = self.connection.execute(
+                "DELETE FROM issues WHERE issue_key NOT IN (SELECT issue_key FROM keep_keys)"
+            ).rowcount
+            self.connection.execute("DELETE FROM keep_keys")
+            return removed
+
+    # ------------------------------------------------------------------
+    # READ
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _where(filters: Dict[str, Any]):
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in INDEXED_COLUMNS and column != "issue_key":
+                raise ValueError(f"'{column}' is not an indexed column: {list(INDEXED_COLUMNS)}")
+            if isinstance(value, tuple):
+                # (start, end) IS AN INCLUSIVE RANGE, None LEAVES THAT SIDE OPEN
+                start, end = value
+                if start is not None:
+                    clauses.append(f"{column} >= ?")
+                    params.append(_iso(start) or str(start))
+                if end is not None:
+                    clauses.append(f"{column} <= ?")
+                    params.append(_iso(end) or str(end))
+            elif isinstance(value, (list, set, frozenset)):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            elif value is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM issues{where}", params).fetchone()[0]
+
+    def find(self, limit: Optional[int] = None, **filters) -> Iterator[Dict[str, Any]]:
+        where, params = self._where(filters)
+        sql = f"SELECT data FROM issues{where} ORDER BY sort_key"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        for (data,) in self.connection.execute(sql, params):
+            yield loads(data)
+
+    def iter_issues(self) -> Iterator[Dict[str, Any]]:
+        return self.find()
+
+    def group_count(self, column: str, **filters) -> List[Sequence[Any]]:
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"'{column}' is not an indexed column: {list(INDEXED_COLUMNS)}")
+        where, params = self._where(filters)
+        return self.connection.execute(
+            f"SELECT {column}, COUNT(*) FROM issues{where} GROUP BY {column} ORDER BY COUNT(*) DESC",
+            params
+        ).fetchall()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> List[Sequence[Any]]:
+        return self.connection.execute(sql, params).fetchall()
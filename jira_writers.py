@@ -0,0 +1,257 @@
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle
+
+# TAB TITLE: (HEADERS, INDEXES OF THE DATE COLUMNS) #
+Tabs = Dict[str, Tuple[Sequence[str], Sequence[int]]]
+Router = Callable[[dict], Iterable[Tuple[str, list]]]
+
+
+class ReportWriter:
+    extension = ""
+
+    def __init__(self, filename: str, tabs: Tabs):
+        self.filename = filename
+        self.tabs = tabs
+        self.outputs: List[str] = []
+        self._pending: List[Tuple[str, str]] = []
+
+    def __enter__(self):
+        try:
+            self.open()
+        except BaseException:
+            # A PARTIAL open() STILL LEAVES FILES BEHIND - __exit__ IS NOT CALLED IN THAT CASE
+            self.abort()
+            raise
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        # A FAILED RUN NEVER REPLACES THE PREVIOUS REPORT - ITS TEMP FILES ARE DISCARDED
+        if exc_type is not None:
+            self.abort()
+            return
+        self.close()
+        self.commit()
+
+    def tab_filename(self, tab: str) -> str:
+        stem = os.path.splitext(self.filename)[0]
+        return f"{stem}_{tab}{self.extension}"
+
+    def temp_filename(self, filename: str) -> str:
+        # ROWS ARE WRITTEN HERE AND RENAMED OVER filename ONLY BY commit()
+        temp = f"{filename}.tmp"
+        self._pending.append((temp, filename))
+        return temp
+
+    def commit(self):
+        for temp, filename in self._pending:
+            os.replace(temp, filename)
+            self.outputs.append(filename)
+        self._pending = []
+
+    def abort(self):
+        try:
+            self.discard()
+        finally:
+            for temp, _ in self._pending:
+                if os.path.exists(temp):
+                    os.remove(temp)
+            self._pending = []
+
+    def open(self):
+        raise NotImplementedError
+
+    def write_row(self, tab: str, row: list):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def discard(self):
+        # RELEASES OPEN FILES WITHOUT FINISHING THE OUTPUT - MAY RUN AFTER A FAILED open()
+        raise NotImplementedError
+
+
+# ------------------------------------------------------------------
+# EXCEL - ONE WORKBOOK, ONE SHEET PER TAB
+# ------------------------------------------------------------------
+
+class ExcelReportWriter(ReportWriter):
+    extension = ".xlsx"
+
+    def open(self):
+        # WRITE-ONLY MODE STREAMS ROWS TO DISK INSTEAD OF KEEPING EVERY CELL IN MEMORY
+        self.workbook = openpyxl.Workbook(write_only=True)
+        date_style = NamedStyle(name='date_style', number_format='DD/MM/YYYY')
+        self.sheets = {}
+        for title, (headers, date_columns) in self.tabs.items():
+            ws = self.workbook.create_sheet(title=title)
+            ws.append(list(headers))
+            # ONE STYLED CELL PER DATE COLUMN, REUSED FOR EVERY ROW OF THE TAB
+            date_cells = []
+            for col_index in date_columns:
+                cell = WriteOnlyCell(ws)
+                cell.style = date_style
+                date_cells.append((col_index, cell))
+            self.sheets[title] = (ws, date_cells)
+
+    def write_row(self, tab: str, row: list):
+        ws, date_cells = self.sheets[tab]
+        for col_index, cell in date_cells:
+            cell.value = row[col_index]
+            row[col_index] = cell
+        ws.append(row)
+
+    def close(self):
+        filename = os.path.splitext(self.filename)[0] + self.extension
+        self.workbook.save(self.temp_filename(filename))
+
+    def discard(self):
+        # NOTHING WAS SAVED YET - ONLY THE WRITE-ONLY SHEETS' OWN TEMP FILES ARE CLOSED
+        for ws, _ in getattr(self, "sheets", {}).values():
+            ws.close()
+
+
+# ------------------------------------------------------------------
+# CSV / NDJSON - ONE FILE PER TAB
+# ------------------------------------------------------------------
+
+class CsvReportWriter(ReportWriter):
+    extension = ".csv"
+
+    def open(self):
+        self.files = {}
+        self.writers = {}
+        for title, (headers, _) in self.tabs.items():
+            filename = self.temp_filename(self.tab_filename(title))
+            self.files[title] = open(filename, "w", newline="", encoding="utf-8")
+            self.writers[title] = csv.writer(self.files[title])
+            self.writers[title].writerow(headers)
+
+    def write_row(self, tab: str, row: list):
+        self.writers[tab].writerow([
+            value.isoformat(sep=" ") if isinstance(value, datetime) else value
+            for value in row
+        ])
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+    def discard(self):
+        for file in getattr(self, "files", {}).values():
+            file.close()
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class NdjsonReportWriter(ReportWriter):
+    extension = ".ndjson"
+
+    def open(self):
+        self.files = {}
+        for title in self.tabs:
+            filename = self.temp_filename(self.tab_filename(title))
+            self.files[title] = open(filename, "w", encoding="utf-8")
+
+    def write_row(self, tab: str, row: list):
+        headers = self.tabs[tab][0]
+        self.files[tab].write(json.dumps(dict(zip(headers, row)), default=_json_default, ensure_ascii=False))
+        self.files[tab].write("\n")
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+    def discard(self):
+        for file in getattr(self, "files", {}).values():
+            file.close()
+
+
+# ------------------------------------------------------------------
+# PARQUET - ONE FILE PER TAB, WRITTEN IN ROW GROUPS (REQUIRES pyarrow)
+# ------------------------------------------------------------------
+
+class ParquetReportWriter(ReportWriter):
+    extension = ".parquet"
+    row_group_size = 10000
+
+    def open(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.writers = {}
+        self.schemas = {}
+        self.buffers = {}
+        for title, (headers, date_columns) in self.tabs.items():
+            schema = pyarrow.schema([
+                (header, pyarrow.timestamp("us") if index in date_columns else pyarrow.string())
+                for index, header in enumerate(headers)
+            ])
+            filename = self.temp_filename(self.tab_filename(title))
+            self.writers[title] = pyarrow.parquet.ParquetWriter(filename, schema)
+            self.schemas[title] = schema
+            self.buffers[title] = [[] for _ in headers]
+
+    def write_row(self, tab: str, row: list):
+        columns = self.buffers[tab]
+        date_columns = self.tabs[tab][1]
+        for index, value in enumerate(row):
+            if value is not None and index not in date_columns:
+                value = str(value)
+            columns[index].append(value)
+        if len(columns[0]) >= self.row_group_size:
+            self._flush(tab)
+
+    def _flush(self, tab: str):
+        columns = self.buffers[tab]
+        if not columns[0]:
+            return
+        self.writers[tab].write_table(self.pa.Table.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schemas[tab])],
+            schema=self.schemas[tab]
+        ))
+        self.buffers[tab] = [[] for _ in columns]
+
+    def close(self):
+        for tab, writer in self.writers.items():
+            self._flush(tab)
+            writer.close()
+
+    def discard(self):
+        for writer in getattr(self, "writers", {}).values():
+            writer.close()
+
+
+WRITERS = {
+    "xlsx": ExcelReportWriter,
+    "csv": CsvReportWriter,
+    "ndjson": NdjsonReportWriter,
+    "parquet": ParquetReportWriter,
+}
+
+
+def write_report(issues: Iterable[dict], writer: ReportWriter, route: Router) -> int:
+    total_issues = 0
+    with writer:
+        for issue in issues:
+            total_issues += 1
+            for tab, row in route(issue):
+                writer.write_row(tab, row)
+    for output in writer.outputs:
+        logging.info(f"Issues exported to: '{output}'")
+    return total_issues
@@ -0,0 +1,554 @@
+import re
+import json
+import time
+import hashlib
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# LOCAL STAND-IN FOR THE JIRA ENDPOINTS USED BY THESE SCRIPTS - FOR BENCHMARKS AND DRY RUNS ONLY #
+# Start with: python mock_jira.py --issues 5000 --latency 0.02 and point JIRA_URL to http://127.0.0.1:8080 #
+
+ISSUE_TYPES = ["TYPE1", "ISSUETYPE2", "ISSUETYPE3", "Story", "Bug"]
+STATUSES = ["Open", "To Do", "In Analysis", "Development Completed", "Done", "Released", "Canceled"]
+TARGET_STATUS = "Expired"
+EXPIRE_TRANSITION = "171"
+ROLE_NAMES = [
+    "Administrators",
+    "Estimate Manager",
+    "Initiative Leader Delegate",
+    "Technical Leader",
+    "Developers",
+    "Users",
+    "Viewers",
+    "Testers",
+    "Product Owner",
+    "Scrum Master",
+    "Service Desk Team",
+    "Release Manager",
+]
+PROFIELDS = [38, 111, 105, 60, 107, 33, 15, 36, 37, 24, 177, 155, 152, 150, 147, 151, 80, 148, 149]
+CUSTOM_FIELDS = {
+    "customfield_21508": "Provider Issue",
+    "customfield_10201": "Start Date",
+    "customfield_10200": "End Date",
+    "customfield_15475": "Actual Dev Date",
+    "customfield_15338": "Providers",
+    "customfield_11700": "Country",
+    "customfield_14613": "APM Code",
+    "customfield_37200": "APM Name",
+    "customfield_34700": "Contract Manager",
+    "customfield_37500": "Contract Delegate",
+    "customfield_30001": "Approval Need",
+    "customfield_10402": "RFC Target Start",
+    "customfield_10403": "RFC Target End",
+    "customfield_22102": "RFC Target Start Time",
+    "customfield_22101": "RFC Target End Time",
+    "customfield_24703": "RFC Source Environment",
+    "customfield_24704": "RFC Target Environment",
+    "customfield_25919": "RFC Status",
+    "customfield_16423": "RFC Change Type",
+    "customfield_22203": "RFC Release Type",
+    "customfield_16424": "RFC APM Name",
+    "customfield_16426": "RFC Provider Name",
+    "customfield_16427": "Contract ID",
+    "customfield_16406": "RFC CAB Note",
+    "customfield_38400": "RFC Contents",
+    "customfield_12015": "RFC Approved By",
+    "customfield_21600": "RFC Rollback",
+}
+
+
+class MockJira:
+
+    def __init__(
+            self,
+            issues: int = 1000,
+            projects: int = 10,
+            actors_per_role: int = 20,
+            page_size: int = 100,
+            latency: float = 0.0,
+            rate_limit: Optional[float] = None,
+            burst_every: int = 0,
+            burst_length: int = 3,
+            retry_after: float = 1.0,
+            error_rate: float = 0.0,
+            seed: int = 0
+    ):
+        self.issue_count = issues
+        self.project_count = projects
+        self.actors_per_role = actors_per_role
+        # SERVER-SIDE CAP ON maxResults, LIKE jira.search.views.default.max #
+        self.page_size = page_size
+        self.latency = latency
+        # ADVERTISED IN X-RateLimit-* AND ENFORCED WITH A TOKEN BUCKET (None = UNLIMITED) #
+        self.rate_limit = rate_limit
+        # EVERY burst_every REQUESTS, THE NEXT burst_length ANSWER 429 WITH Retry-After #
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        # SHARE OF REQUESTS ANSWERED WITH A RANDOM 5XX #
+        self.error_rate = error_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.reset()
+
+    # ------------------------------------------------------------------
+    # STATE
+    # ------------------------------------------------------------------
+
+    def reset(self):
+        with self._lock:
+            self.status_overrides: Dict[str, str] = {}
+            self.labels: Dict[str, List[str]] = {}
+            self.roles: Dict[str, Dict[str, List[dict]]] = {}
+            self.profields: Dict[str, Dict[int, Any]] = {}
+            self._search_cache: Dict[str, List[int]] = {}
+            self.tokens = float(self.rate_limit or 0)
+            self.updated = time.monotonic()
+            self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "bytes_sent": 0, "endpoints": {}}
+        self._served = 0
+
+    def project_key(self, index: int) -> str:
+        return f"P{index:03d}"
+
+    def project_keys(self) -> List[str]:
+        return [self.project_key(index) for index in range(self.project_count)]
+
+    def issue_key(self, index: int) -> str:
+        per_project = -(-self.issue_count // self.project_count)
+        return f"{self.project_key(index // per_project)}-{index % per_project + 1}"
+
+    def issue_index(self, issue_key: str) -> Optional[int]:
+        project, _, number = issue_key.rpartition("-")
+        if not project.startswith("P") or not number.isdigit() or not project[1:].isdigit():
+            return None
+        per_project = -(-self.issue_count // self.project_count)
+        index = int(project[1:]) * per_project + int(number) - 1
+        return index if 0 <= index < self.issue_count and int(number) <= per_project else None
+
+    def issue_type(self, index: int) -> str:
+        return ISSUE_TYPES[index % len(ISSUE_TYPES)]
+
+    def issue_status(self, index: int) -> str:
+        return self.status_overrides.get(self.issue_key(index), STATUSES[index % len(STATUSES)])
+
+    def issue_labels(self, index: int) -> List[str]:
+        return self.labels.get(self.issue_key(index), [])
+
+    def issue(self, index: int, fields: Optional[List[str]] = None) -> dict:
+        # ISSUES ARE BUILT ON DEMAND FROM THEIR INDEX - ONLY STATUS AND LABEL CHANGES ARE STORED
+        rng = random.Random(self.seed * 1000003 + index)
+        key = self.issue_key(index)
+        project = key.rpartition("-")[0]
+        status = self.issue_status(index)
+        day = 1 + index % 28
+        user = {"displayName": f"User {rng.randint(1, 500)}", "name": f"user{rng.randint(1, 500)}"}
+        all_fields = {
+            "summary": f"Mock issue {key}",
+            "issuetype": {"id": str(ISSUE_TYPES.index(self.issue_type(index)) + 1), "name": self.issue_type(index)},
+            "project": {"id": str(10000 + int(project[1:])), "key": project, "name": f"Project {project}"},
+            "priority": {"name": rng.choice(["Low", "Medium", "High"])},
+            "status": {"id": str(STATUSES.index(status) + 1) if status in STATUSES else "99", "name": status},
+            "components": [{"name": f"Component {rng.randint(1, 9)}"}],
+            "labels": self.issue_labels(index),
+            "created": f"2024-01-{day:02d}T10:11:12.000+0000",
+            "updated": f"2024-02-{day:02d}T08:09:10.000+0000",
+            "assignee": user if index % 5 else None,
+            "reporter": user,
+            "description": f"Description of {key}" if index % 3 else None,
+            "customfield_21508": {"fields": {"summary": f"Provider {rng.randint(1, 20)}"}},
+            "customfield_10201": f"2024-03-{day:02d}",
+            "customfield_10200": f"2024-04-{day:02d}" if index % 2 else None,
+            "customfield_15475": None,
+            "customfield_15338": [{"value": f"provider {rng.randint(1, 20)}"}],
+            "customfield_11700": {"value": rng.choice(["Brasil", "Portugal", "Espanha"])},
+            "customfield_14613": [f"APM{rng.randint(100, 999)}"],
+            "customfield_37200": f"APM Name {rng.randint(1, 50)}",
+            "customfield_34700": [user],
+            "customfield_37500": user,
+            "customfield_30001": {"value": rng.choice(["Yes", "No"])},
+            "customfield_10402": f"2024-05-{day:02d}",
+            "customfield_10403": f"2024-05-{day:02d}",
+            "customfield_22102": "10:30",
+            "customfield_22101": "18:00",
+            "customfield_24703": ["DEV"],
+            "customfield_24704": ["PRD"],
+            "customfield_25919": "Approved",
+            "customfield_16423": "Normal",
+            "customfield_22203": {"value": "Major"},
+            "customfield_16424": f"APM Name {rng.randint(1, 50)}",
+            "customfield_16426": f"Provider {rng.randint(1, 20)}",
+            "customfield_16427": f"CT-{rng.randint(1000, 9999)}",
+            "customfield_16406": "CAB ok",
+            "customfield_38400": [{"key": f"{project}-1", "fields": {"issuetype": {"name": "Story"}}}],
+            "customfield_12015": [user],
+            "customfield_21600": {"value": "Yes"},
+        }
+        if fields and "*all" not in fields:
+            all_fields = {name: all_fields.get(name) for name in fields}
+        return {"id": str(100000 + index), "key": key, "fields": all_fields}
+
+    # ------------------------------------------------------------------
+    # JQL - ONLY THE CLAUSES THESE SCRIPTS SEND: key/project/type IN (...) AND THE MISSING-LABELS FILTER
+    # ------------------------------------------------------------------
+
+    def search(self, jql: str) -> List[int]:
+        lowered = jql.lower()
+        if "labels" in lowered:
+            return self._filter(jql)
+        cached = self._search_cache.get(jql)
+        if cached is None:
+            cached = self._search_cache[jql] = self._filter(jql)
+        return cached
+
+    def _filter(self, jql: str) -> List[int]:
+        clauses = _in_clauses(jql)
+        if "key" in clauses:
+            indexes = sorted({i for i in map(self.issue_index, clauses["key"]) if i is not None})
+        else:
+            indexes = range(self.issue_count)
+        projects = clauses.get("project")
+        types = clauses.get("type") or clauses.get("issuetype")
+        # THE MISSING-LABELS FILTER: (labels is EMPTY OR labels != "A" OR labels != "B")
+        missing = re.findall(r'labels != "([^"]*)"', jql)
+        result = []
+        for index in indexes:
+            if projects is not None and self.issue_key(index).rpartition("-")[0] not in projects:
+                continue
+            if types is not None and self.issue_type(index) not in types:
+                continue
+            if missing and all(label in self.issue_labels(index) for label in missing):
+                continue
+            result.append(index)
+        return result
+
+    # ------------------------------------------------------------------
+    # ROLES AND PROFIELDS
+    # ------------------------------------------------------------------
+
+    def project_roles(self, project: str) -> Dict[str, List[dict]]:
+        if project not in self.roles:
+            rng = random.Random(f"{self.seed}-{project}")
+            self.roles[project] = {
+                role_name: (
+                    [{"type": "atlassian-user-role-actor", "name": f"user{rng.randint(1, 500)}"}
+                     for _ in range(self.actors_per_role)]
+                    + [{"type": "atlassian-group-role-actor", "name": name}
+                       for name in ("jira-administrators", f"group-{project.lower()}")]
+                )
+                for role_name in ROLE_NAMES
+            }
+        return self.roles[project]
+
+    def project_values(self, project: str) -> Dict[int, Any]:
+        if project not in self.profields:
+            self.profields[project] = {field_id: {"value": f"value {field_id}"} for field_id in PROFIELDS}
+        return self.profields[project]
+
+    # ------------------------------------------------------------------
+    # FAULTS
+    # ------------------------------------------------------------------
+
+    def fault(self):
+        # RETURNS (STATUS, HEADERS) OF AN INJECTED FAILURE, OR None
+        with self._lock:
+            self._served += 1
+            if self.burst_every and self._served % self.burst_every < self.burst_length \
+                    and self._served >= self.burst_every:
+                self.stats["rate_limited"] += 1
+                return 429, {"Retry-After": str(self.retry_after)}
+            if self.rate_limit:
+                now = time.monotonic()
+                self.tokens = min(self.rate_limit, self.tokens + (now - self.updated) * self.rate_limit)
+                self.updated = now
+                if self.tokens < 1:
+                    self.stats["rate_limited"] += 1
+                    return 429, {"Retry-After": f"{(1 - self.tokens) / self.rate_limit:.2f}"}
+                self.tokens -= 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return self._random.choice((500, 502, 503)), {}
+        return None
+
+    def rate_headers(self) -> Dict[str, str]:
+        if not self.rate_limit:
+            return {}
+        return {
+            "X-RateLimit-Limit": str(int(self.rate_limit)),
+            "X-RateLimit-FillRate": str(int(self.rate_limit)),
+            "X-RateLimit-Interval-Seconds": "1",
+            "X-RateLimit-Remaining": str(max(0, int(self.tokens))),
+        }
+
+
+def _in_clauses(jql: str) -> Dict[str, set]:
+    clauses = {}
+    lowered = jql.lower()
+    position = 0
+    while True:
+        start = lowered.find(" in (", position)
+        if start < 0:
+            return clauses
+        name = lowered[:start].split()[-1].lstrip("(")
+        end = jql.find(")", start)
+        values = {value.strip().strip('"').strip("'") for value in jql[start + 5:end].split(",")}
+        clauses[name] = values
+        position = end
+
+
+def _template(path: str) -> str:
+    # /rest/api/2/issue/P001-12/transitions -> /rest/api/2/issue/{key}/transitions
+    parts = path.split("/")
+    for i, part in enumerate(parts):
+        if i > 0 and parts[i - 1] in ("issue", "project", "projects") and part:
+            parts[i] = "{key}"
+        elif i > 0 and parts[i - 1] in ("role", "fields") and part.isdigit():
+            parts[i] = "{id}"
+    return "/".join(parts)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    jira: MockJira = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _send(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None):
+        data = b"" if body is None else json.dumps(body).encode("utf-8")
+        if self.command == "GET" and status == 200:
+            # ETag ON EVERY GET - A MATCHING If-None-Match GETS AN EMPTY 304
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            headers = dict(headers or {}, ETag=etag)
+            if self.headers.get("If-None-Match") == etag:
+                status, data = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.jira._lock:
+            self.jira.stats["bytes_sent"] += len(data)
+
+    def _handle(self, method: str):
+        jira = self.jira
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"null") if length else None
+
+        if path.startswith("/mock/"):
+            return self._mock_api(method, path)
+
+        endpoint = f"{method} {_template(path)}"
+        with jira._lock:
+            jira.stats["requests"] += 1
+            jira.stats["endpoints"][endpoint] = jira.stats["endpoints"].get(endpoint, 0) + 1
+        if jira.latency:
+            time.sleep(jira.latency)
+        fault = jira.fault()
+        if fault is not None:
+            return self._send(fault[0], {"errorMessages": ["Injected by mock_jira"]}, fault[1])
+        try:
+            status, body = self._route(method, path, query, payload)
+        except KeyError as e:
+            status, body = 404, {"errorMessages": [f"Not found: {e}"]}
+        self._send(status, body, jira.rate_headers())
+
+    def _mock_api(self, method: str, path: str):
+        if path == "/mock/stats":
+            return self._send(200, self.jira.stats)
+        if path == "/mock/reset" and method == "POST":
+            self.jira.reset()
+            return self._send(204)
+        if path == "/mock/reset-stats" and method == "POST":
+            self.jira.reset_stats()
+            return self._send(204)
+        return self._send(404)
+
+    def _route(self, method: str, path: str, query: Dict[str, str], payload: Any):
+        jira = self.jira
+        parts = path.split("/")
+
+        if path in ("/rest/api/2/search", "/rest/api/2/search/jql"):
+            if method == "POST":
+                query = payload or {}
+            matches = jira.search(query.get("jql", ""))
+            start_at = int(query.get("startAt") or 0)
+            max_results = min(int(query.get("maxResults") or 50), jira.page_size)
+            fields = query.get("fields") or "*all"
+            fields = fields if isinstance(fields, list) else fields.split(",")
+            page = matches[start_at:start_at + max_results]
+            return 200, {
+                "startAt": start_at,
+                "maxResults": max_results,
+                "total": len(matches),
+                "issues": [jira.issue(index, fields) for index in page],
+            }
+
+        if path == "/rest/api/2/field":
+            system = ["summary", "issuetype", "project", "priority", "status", "components", "labels",
+                      "created", "updated", "assignee", "reporter", "description"]
+            return 200, (
+                [{"id": field_id, "name": field_id.title(), "custom": False} for field_id in system]
+                + [{"id": field_id, "name": name, "custom": True} for field_id, name in CUSTOM_FIELDS.items()]
+            )
+
+        if path == "/rest/api/2/project":
+            return 200, [
+                {"id": str(10000 + i), "key": key, "name": f"Project {key}"}
+                for i, key in enumerate(jira.project_keys())
+            ]
+
+        # /rest/api/2/project/{key}/role[/{id}]
+        if path.startswith("/rest/api/2/project/") and len(parts) >= 7 and parts[6] == "role":
+            project = parts[5]
+            if project not in jira.project_keys():
+                raise KeyError(project)
+            with jira._lock:
+                roles = jira.project_roles(project)
+                if len(parts) == 7:
+                    base = f"http://{self.headers.get('Host')}/rest/api/2/project/{project}/role"
+                    return 200, {name: f"{base}/{10000 + i}" for i, name in enumerate(roles)}
+                role_name = list(roles)[int(parts[7]) - 10000]
+                actors = roles[role_name]
+                if method == "POST":
+                    for actor_type, parameter in (("atlassian-user-role-actor", "user"),
+                                                  ("atlassian-group-role-actor", "group")):
+                        for name in (payload or {}).get(parameter, []):
+                            if not any(a["name"] == name and a["type"] == actor_type for a in actors):
+                                actors.append({"type": actor_type, "name": name})
+                elif method == "DELETE":
+                    for actor_type, parameter in (("atlassian-user-role-actor", "user"),
+                                                  ("atlassian-group-role-actor", "group")):
+                        if parameter in query:
+                            roles[role_name] = [
+                                a for a in actors
+                                if not (a["name"] == query[parameter] and a["type"] == actor_type)
+                            ]
+                    return 204, None
+                return 200, {"name": role_name, "id": int(parts[7]), "actors": roles[role_name]}
+
+        # /rest/api/2/issue/{key}[/transitions]
+        if path.startswith("/rest/api/2/issue/"):
+            index = jira.issue_index(parts[5])
+            if index is None:
+                raise KeyError(parts[5])
+            issue_key = jira.issue_key(index)
+            if len(parts) == 6:
+                if method == "PUT":
+                    with jira._lock:
+                        labels = list(jira.issue_labels(index))
+                        for change in ((payload or {}).get("update") or {}).get("labels", []):
+                            if "add" in change and change["add"] not in labels:
+                                labels.append(change["add"])
+                            if "remove" in change and change["remove"] in labels:
+                                labels.remove(change["remove"])
+                        if "labels" in ((payload or {}).get("fields") or {}):
+                            labels = list(payload["fields"]["labels"])
+                        jira.labels[issue_key] = labels
+                        jira._search_cache.clear()
+                    return 204, None
+                return 200, jira.issue(index)
+            if parts[6] == "transitions":
+                available = jira.issue_status(index) != TARGET_STATUS
+                if method == "GET":
+                    transitions = [{"id": EXPIRE_TRANSITION, "name": "Expire",
+                                    "to": {"id": "99", "name": TARGET_STATUS}}] if available else []
+                    return 200, {"transitions": transitions}
+                transition_id = str(((payload or {}).get("transition") or {}).get("id"))
+                if not available or transition_id != EXPIRE_TRANSITION:
+                    return 400, {"errorMessages": [f"Transition {transition_id} is not valid for {issue_key}"]}
+                with jira._lock:
+                    jira.status_overrides[issue_key] = TARGET_STATUS
+                return 204, None
+
+        # /rest/profields/api/2.0/values/projects/{key}/fields[/{id}]
+        if path.startswith("/rest/profields/api/2.0/values/projects/"):
+            project = parts[7]
+            if project not in jira.project_keys():
+                raise KeyError(project)
+            with jira._lock:
+                values = jira.project_values(project)
+                if len(parts) == 9 and method == "GET":
+                    return 200, [{"field": {"id": field_id}, "value": value} for field_id, value in values.items()]
+                if len(parts) == 10 and method == "POST":
+                    values[int(parts[9])] = (payload or {}).get("value")
+                    return 200, {}
+
+        raise KeyError(f"{method} {path}")
+
+
+def serve(jira: MockJira, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    # port=0 PICKS A FREE PORT - THE URL IS f"http://{host}:{server.server_address[1]}"
+    handler = type("BoundMockHandler", (MockHandler,), {"jira": jira})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock Jira server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--issues", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--actors-per-role", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second, 429 above it")
+    parser.add_argument("--burst-every", type=int, default=0, help="inject a 429 burst every N requests")
+    parser.add_argument("--burst-length", type=int, default=3)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 5xx")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    jira = MockJira(
+        issues=args.issues,
+        projects=args.projects,
+        actors_per_role=args.actors_per_role,
+        page_size=args.page_size,
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    server = serve(jira, args.host, args.port)
+    print(f"Mock Jira listening on http://{args.host}:{server.server_address[1]} - Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()